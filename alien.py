@@ -1,31 +1,40 @@
-import pygame
-from pygame.sprite import Sprite
+from entity import Entity
+import assets
 
 
-class Alien(Sprite):
+class Alien(Entity):
     """ A class to represent a single alien in the fleet. """
 
+    # Aliens are recycled through SpriteFleet, so give them fixed attributes
+    __slots__ = ('screen', 'ai_settings', 'image', 'rect', 'x', 'previous_x', 'alien_number',
+                 'row_number')
+
     def __init__(self, ai_settings, screen):
         """ Initialize the alien and set its starting position. """
         super(Alien, self).__init__()
         self.screen = screen
         self.ai_settings = ai_settings
 
-        # Load the alien image and set its rect attribute.
-        self.image = pygame.image.load('spaceship.png')
+        # Use the shared alien image and set its rect attribute.
+        self.image = assets.load_image('spaceship.png')
         self.rect = self.image.get_rect()
 
         # Start each alien near the top left of the screen
         self.rect.x = self.rect.width
         self.rect.y = self.rect.height
 
-        # Store the alien's exact position
+        # Store the alien's exact position, and where it was one step ago
         self.x = float(self.rect.x)
+        self.previous_x = self.x
 
     def blitme(self):
         """ Draw the alien at its current location. """
         self.screen.blit(self.image, self.rect)
 
+    def interpolated_topleft(self, alpha):
+        """ Return where to draw the alien, alpha of the way from its last step. """
+        return int(self.previous_x + (self.x - self.previous_x) * alpha), self.rect.y
+
     def check_edges(self):
         """ Return True if alien is at edge of the screen """
         screen_rect = self.screen.get_rect()
@@ -38,7 +47,9 @@ class Alien(Sprite):
         """ Move the alien to the right """
         # Track alien's position using the self.x attribute, then we update
         # the position alien's rect using value of self.x
-        # Moving the alien left or right
-        self.x += (self.ai_settings.alien_speed_factor * self.ai_settings.fleet_direction)
+        # Moving the alien left or right, by the step Settings works out when the speed or
+        # direction changes
+        self.previous_x = self.x
+        self.x += self.ai_settings.alien_step
         self.rect.x = self.x
 
@@ -0,0 +1,57 @@
+import pygame
+
+# Every image the game draws, so they can all be loaded before the first frame.
+GAME_IMAGES = ('spaceship.png', 'rocket.png')
+
+# Shared surfaces keyed by file name. Sprites hold references to these rather than
+# owning a copy, so they must never be drawn on.
+_images = {}
+
+# Names of the cached images that have already been converted to the display format.
+_converted = set()
+
+# The default font at each size asked for. SysFont() scans every installed font (it runs
+# fc-list on Linux) just to fall back to this same font, so it's loaded directly instead.
+_fonts = {}
+
+
+def load_image(filename):
+    """ Return the shared surface for filename, loading it from disk the first time. """
+    image = _images.get(filename)
+    if image is None:
+        image = pygame.image.load(filename)
+        _images[filename] = image
+        _convert(filename)
+        image = _images[filename]
+    return image
+
+
+def load_font(size):
+    """ Return the shared default font at size, loading it the first time. """
+    font = _fonts.get(size)
+    if font is None:
+        font = pygame.font.Font(None, size)
+        _fonts[size] = font
+    return font
+
+
+def _convert(filename):
+    """ convert_alpha() the cached image once a display mode exists. """
+    if filename not in _converted and pygame.display.get_surface() is not None:
+        _images[filename] = _images[filename].convert_alpha()
+        _converted.add(filename)
+
+
+def preload(filenames=GAME_IMAGES):
+    """ Load and convert every game image up front so no level pays for disk I/O. """
+    for filename in filenames:
+        load_image(filename)
+
+        # Images loaded before set_mode() are converted now that the display exists.
+        _convert(filename)
+
+
+def clear():
+    """ Drop every cached surface (e.g. after the display mode changes). """
+    _images.clear()
+    _converted.clear()
@@ -0,0 +1,287 @@
+""" Time the per-frame hot paths of Alien Invasion and save the results as JSON.
+
+    python benchmark.py --output bench.json
+    python benchmark.py --output new.json --compare bench.json
+"""
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+
+# headless sets up the dummy video driver before pygame is imported
+import headless
+import pygame
+from settings import Settings
+from ship import Ship
+from game_stats import GameStats
+from button import Button
+from scoreboard import Scoreboard
+from bullet import BulletGroup
+from fleet import make_fleet, ArrayFleet
+from renderer import DirtyRenderer
+from texture_renderer import TextureRenderer
+import game_functions as gf
+import assets
+
+RESOLUTIONS = [(600, 400), (1280, 720), (1920, 1080), (3840, 2160)]
+FLEET_SIZES = ['full', 300, 1500]
+BULLET_COUNTS = [3, 100, 1000]
+
+
+class BenchGame():
+    """ The run_game objects on a dummy display, with the fleet and bullets set up for a case. """
+
+    def __init__(self, width, height, fleet_size, bullet_count, fleet_backend, seed=0):
+        """ Initialize the game for one benchmark case. """
+        self.ai_settings = Settings()
+        self.ai_settings.screen_width = width
+        self.ai_settings.screen_height = height
+        self.ai_settings.fleet_backend = fleet_backend
+        self.ai_settings.bullets_allowed = bullet_count
+        self.ai_settings.respawn_pause = 0
+        self.ai_settings.level_pause = 0
+        self.fleet_size = fleet_size
+        self.bullet_count = bullet_count
+        self.random = random.Random(seed)
+
+        self.screen = pygame.display.set_mode((width, height))
+        assets.clear()
+        assets.preload()
+        self.play_button = Button(self.ai_settings, self.screen, "Play")
+        self.stats = GameStats(self.ai_settings)
+        self.sb = Scoreboard(self.ai_settings, self.screen, self.stats)
+        self.ship = Ship(self.ai_settings, self.screen)
+        self.bullets = BulletGroup()
+        self.aliens = make_fleet(self.ai_settings, self.screen)
+        self.renderer = DirtyRenderer(self.ai_settings, self.screen)
+        # None where SDL's Renderer can't start; its timing is left out then
+        self.texture_renderer = TextureRenderer.create(self.ai_settings)
+
+        self.reset()
+        self.capacity = len(self.aliens)
+
+    def reset(self):
+        """ Start a game with a fresh fleet of the case's size and a spread of bullets. """
+        gf.start_game(self.ai_settings, self.screen, self.stats, self.sb, self.ship,
+                      self.aliens, self.bullets)
+        self.trim_fleet()
+        self.fill_bullets()
+
+    def trim_fleet(self):
+        """ Remove aliens from the back of the fleet until it is the case's size. """
+        if self.fleet_size == 'full' or len(self.aliens) <= self.fleet_size:
+            return
+        extra = len(self.aliens) - self.fleet_size
+        if isinstance(self.aliens, ArrayFleet):
+            self.aliens._kill(self.aliens.alive.nonzero()[0][-extra:])
+        else:
+            for alien in self.aliens.sprites()[-extra:]:
+                alien.kill()
+
+    def fill_bullets(self):
+        """ Replace the bullets with bullet_count bullets spread over the screen. """
+        self.bullets.empty()
+
+        # Fire the highest bullets first, so they are in the order real ones would be fired in
+        heights = sorted(self.random.randrange(self.ai_settings.screen_height)
+                         for bullet_number in range(self.bullet_count))
+        for y in heights:
+            bullet = self.bullets.fire(self.ai_settings, self.screen, self.ship)
+            bullet.rect.centerx = self.random.randrange(self.ai_settings.screen_width)
+            bullet.y = float(y)
+            bullet.previous_y = bullet.y
+            bullet.rect.y = bullet.y
+
+    def update_game(self):
+        gf.update_game(self.ai_settings, self.screen, self.stats, self.sb, self.ship,
+                       self.aliens, self.bullets)
+
+    def update_screen(self, renderer=None):
+        gf.update_screen(self.ai_settings, self.screen, self.stats, self.sb, self.ship,
+                         self.aliens, self.bullets, self.play_button, .5, renderer)
+
+    def frame(self):
+        """ One frame of run_game: a simulation step and a dirty-rect redraw. """
+        if not self.stats.game_active:
+            self.reset()
+        self.ship.controls.moving_right = self.random.random() < .5
+        self.ship.controls.moving_left = not self.ship.controls.moving_right
+        self.update_game()
+        self.update_screen(self.renderer)
+
+
+def measure(function, iterations, setup=None):
+    """ Call function iterations times, running setup (untimed) before each call, and
+    return each call's time in milliseconds. """
+    times = []
+    for iteration in range(iterations):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        function()
+        times.append((time.perf_counter() - start) * 1000.0)
+    return times
+
+
+def summarize(times):
+    """ Return the median, p99 and mean of a list of timings. """
+    ordered = sorted(times)
+    return {
+        'median_ms': ordered[len(ordered) // 2],
+        'p99_ms': ordered[min(len(ordered) - 1, int(len(ordered) * .99))],
+        'mean_ms': sum(ordered) / len(ordered),
+        'iterations': len(ordered),
+    }
+
+
+def bench_case(game, iterations):
+    """ Time each hot path for one case and return {name: summary}. """
+    objects = (game.ai_settings, game.screen, game.stats, game.sb, game.ship, game.aliens,
+               game.bullets)
+    timings = {}
+
+    timings['create_fleet'] = measure(lambda: gf.create_fleet(game.ai_settings, game.screen,
+                                                              game.ship, game.aliens),
+                                      iterations, game.aliens.empty)
+
+    # Each simulation step runs against the fleet and bullets the case starts with
+    game.reset()
+    timings['update_aliens'] = measure(lambda: gf.update_aliens(*objects), iterations, game.reset)
+    timings['update_bullets'] = measure(lambda: gf.update_bullets(*objects), iterations, game.reset)
+    timings['check_bullet_alien_collisions'] = measure(
+        lambda: gf.check_bullet_alien_collisions(*objects), iterations, game.reset)
+
+    game.reset()
+    timings['update_screen_full'] = measure(game.update_screen, iterations)
+    game.renderer.invalidate()
+    game.update_screen(game.renderer)
+    timings['update_screen_dirty'] = measure(lambda: game.update_screen(game.renderer), iterations)
+    if game.texture_renderer is not None:
+        timings['update_screen_texture'] = measure(lambda: game.update_screen(game.texture_renderer),
+                                                   iterations)
+
+    # prep_*() only marks an image as out of date; refresh() is where it gets rendered
+    sb = game.sb
+    timings['prep_score'] = measure(lambda: (sb.prep_score(), sb.refresh()), iterations)
+    timings['prep_high_score'] = measure(lambda: (sb.prep_high_score(), sb.refresh()), iterations)
+    timings['prep_level_image'] = measure(lambda: (sb.prep_level_image(), sb.refresh()), iterations)
+    timings['prep_ships'] = measure(lambda: (sb.prep_ships(), sb.refresh()), iterations)
+
+    # A whole frame, played forward, as run_game would run it
+    game.reset()
+    game.renderer.invalidate()
+    timings['frame'] = measure(game.frame, iterations)
+
+    return dict((name, summarize(times)) for name, times in timings.items())
+
+
+def git_commit():
+    """ Return the current commit hash, or None outside a git checkout. """
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL,
+                                       text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(resolutions, fleet_sizes, bullet_counts, fleet_backend, iterations, log=print):
+    """ Run every case of the sweep and return the results document. """
+    pygame.display.init()
+    pygame.font.init()
+    results = []
+    for width, height in resolutions:
+        capacity = BenchGame(width, height, 'full', 0, fleet_backend).capacity
+        for fleet_size in fleet_sizes:
+            if fleet_size != 'full' and fleet_size > capacity:
+                log("skip {}x{} fleet {}: only {} aliens fit".format(width, height, fleet_size, capacity))
+                continue
+
+            for bullet_count in bullet_counts:
+                game = BenchGame(width, height, fleet_size, bullet_count, fleet_backend)
+                case = {'resolution': '{}x{}'.format(width, height), 'fleet': len(game.aliens),
+                        'fleet_size': fleet_size, 'bullets': bullet_count, 'backend': fleet_backend}
+                timings = bench_case(game, iterations)
+                results.append({'case': case, 'timings': timings})
+                log("{resolution} fleet {fleet} bullets {bullets}: frame median {0:.3f} ms, "
+                    "p99 {1:.3f} ms".format(timings['frame']['median_ms'], timings['frame']['p99_ms'],
+                                            **case))
+
+    return {
+        'commit': git_commit(),
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'pygame': pygame.version.ver,
+        'platform': platform.platform(),
+        'iterations': iterations,
+        'results': results,
+    }
+
+
+def case_key(result):
+    case = result['case']
+    return (case['resolution'], case['fleet_size'], case['bullets'], case['backend'])
+
+
+def compare(old, new, threshold, log=print):
+    """ Log each timing's change from old to new and return how many got slower than threshold. """
+    old_results = dict((case_key(result), result) for result in old['results'])
+    regressions = 0
+    for result in new['results']:
+        before = old_results.get(case_key(result))
+        if before is None:
+            continue
+        for name, timing in sorted(result['timings'].items()):
+            if name not in before['timings']:
+                continue
+            old_median = before['timings'][name]['median_ms']
+            ratio = timing['median_ms'] / old_median if old_median else 1.0
+            regressed = ratio > 1 + threshold
+            regressions += regressed
+            label = ' '.join(map(str, case_key(result) + (name,)))
+            log("{:<11}{:<60} {:>9.3f} -> {:>9.3f} ms  x{:.2f}".format(
+                'REGRESSION' if regressed else '', label, old_median, timing['median_ms'], ratio))
+    return regressions
+
+
+def parse_resolution(text):
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+
+def parse_fleet_size(text):
+    return text if text == 'full' else int(text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--resolutions', nargs='+', type=parse_resolution,
+                        default=RESOLUTIONS, metavar='WxH')
+    parser.add_argument('--fleets', nargs='+', type=parse_fleet_size, default=FLEET_SIZES,
+                        help="alien counts, or 'full' for as many as fit the screen")
+    parser.add_argument('--bullets', nargs='+', type=int, default=BULLET_COUNTS)
+    parser.add_argument('--backend', default='sprite', choices=['group', 'sprite', 'array'])
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--output', help="write the results to this JSON file")
+    parser.add_argument('--compare', help="JSON results from an earlier run to compare against")
+    parser.add_argument('--threshold', type=float, default=.10,
+                        help="slowdown that counts as a regression (default 0.10 = 10%%)")
+    args = parser.parse_args()
+
+    results = run(args.resolutions, args.fleets, args.bullets, args.backend, args.iterations)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(json.load(file), results, args.threshold)
+        if regressions:
+            print("{} timings regressed by more than {:.0%}".format(regressions, args.threshold))
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
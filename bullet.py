@@ -1,12 +1,16 @@
 import pygame
-from pygame.sprite import Sprite
+from pygame.sprite import Group
+from entity import Entity
 
 
 # Sprite used to group related elements in the game and act on all grouped elements at once.
-# Call super() to inherit properly from Sprite
-class Bullet(Sprite):
+# Call super() to inherit properly from Sprite (an Entity is a lighter Sprite)
+class Bullet(Entity):
     """ A class to manage bullets fired from the ship """
 
+    # Bullets are recycled through BulletGroup, so give them fixed attributes
+    __slots__ = ('screen', 'rect', 'y', 'previous_y', 'color', 'step')
+
     def __init__(self, ai_settings, screen, ship):
 
         """ Create a bullet object at the ship's current position. """
@@ -16,29 +20,83 @@ class Bullet(Sprite):
         # Create a bullet rect at (0,0) and set correct position
         self.rect = pygame.Rect(0, 0, ai_settings.bullet_width,
                                 ai_settings.bullet_height)
+        self.reset(ai_settings, ship)
+
+    def reset(self, ai_settings, ship):
+        """ Put the bullet back at the ship's current position, as if it was just fired. """
 
         # Set bullet's centerx equal to ship's centerx ( Should emerge from top of ship )
+        self.rect.size = (ai_settings.bullet_width, ai_settings.bullet_height)
         self.rect.centerx = ship.rect.centerx
         self.rect.top = ship.rect.top
 
-        # Store the bullet's position as a decimal value
+        # Store the bullet's position as a decimal value, and where it was one step ago
         self.y = float(self.rect.y)
+        self.previous_y = self.y
 
+        # The speed goes up with each level, so work out how far the bullet moves each step
+        # again every time it's fired
         self.color = ai_settings.bullet_color
-        self.speed_factor = ai_settings.bullet_speed_factor
+        self.step = ai_settings.bullet_speed_factor * ai_settings.time_step
 
     def update(self):
         """ Move the bullet up the screen. """
 
         # Update the decimal position of the bullet
         # When the bullet fired, it's moving up the screen, therefore, a decreasing y-coordinate value
-        self.y -= self.speed_factor
+        self.previous_y = self.y
+        self.y -= self.step
 
         # Update the rect position.
         self.rect.y = self.y
 
-    def draw_bullet(self):
-        """ Draw the bullet to the screen. """
-        pygame.draw.rect(self.screen, self.color, self.rect)
+    def interpolated_rect(self, alpha):
+        """ Return where to draw the bullet, alpha of the way from its last step. """
+        rect = self.rect.copy()
+        rect.y = self.previous_y + (self.y - self.previous_y) * alpha
+        return rect
+
+    def draw_bullet(self, alpha=1.0):
+        """ Draw the bullet to the screen, alpha of the way from its last step. """
+        pygame.draw.rect(self.screen, self.color, self.interpolated_rect(alpha))
+
+
+
+
+class BulletGroup(Group):
+    """ A Group of bullets that keeps removed bullets on a free list and fires them again.
+
+    Every bullet moves at the same speed, so the group's insertion order (the order they
+    were fired) is also the order they leave the top of the screen. The bullets that are
+    gone are always at the front, and remove_offscreen() stops at the first one that isn't.
+    """
+
+    def __init__(self, *sprites):
+        """ Initialize the group with an empty free list. """
+        self.free = []
+        super(BulletGroup, self).__init__(*sprites)
+
+    def fire(self, ai_settings, screen, ship):
+        """ Add a bullet at the ship, reusing a removed one if there is one. """
+        if self.free:
+            bullet = self.free.pop()
+            bullet.reset(ai_settings, ship)
+        else:
+            bullet = Bullet(ai_settings, screen, ship)
+        self.add(bullet)
+        return bullet
 
+    def remove_internal(self, sprite):
+        """ Remove the bullet from the Group and keep it for the next shot (kill() ends up here). """
+        super(BulletGroup, self).remove_internal(sprite)
+        self.free.append(sprite)
 
+    def remove_offscreen(self):
+        """ Remove the bullets that have left the top of the screen. """
+        gone = []
+        for bullet in self.spritedict:
+            if bullet.rect.bottom > 0:
+                break
+            gone.append(bullet)
+        if gone:
+            self.remove(*gone)
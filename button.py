@@ -1,4 +1,6 @@
+import pygame
 import pygame.font
+import assets
 
 class Button():
     def __init__(self, ai_settings, screen, msg):
@@ -10,7 +12,7 @@ class Button():
         self.width, self.height = 200, 50
         self.button_color = (0, 255, 0)
         self.text_color = (255, 255, 255)
-        self.font = pygame.font.SysFont(None, 48)
+        self.font = assets.load_font(48)
 
         # Build the button's rect object and center it.
         self.rect = pygame.Rect(0, 0, self.width, self.height)
@@ -27,7 +29,11 @@ class Button():
         self.msg_image_rect = self.msg_image.get_rect()
         self.msg_image_rect.center = self.rect.center
 
+        # Bake the blank button and its message into one image, drawn with a single blit
+        self.image = pygame.Surface(self.rect.size)
+        self.image.fill(self.button_color)
+        self.image.blit(self.msg_image, self.msg_image_rect.move(-self.rect.x, -self.rect.y))
+
     def draw_button(self):
-        # Draw a blank button and then draw message
-        self.screen.fill(self.button_color, self.rect)
-        self.screen.blit(self.msg_image, self.msg_image_rect)
+        # Draw the pre-rendered button
+        self.screen.blit(self.image, self.rect)
@@ -0,0 +1,104 @@
+import atexit
+import json
+import os
+import queue
+import threading
+
+import pygame
+
+# How captured frames are saved: a numbered PNG per frame, or every frame's pixels one
+# after another in a single file, for an encoder to read as raw video
+PNG = 'png'
+RAW = 'raw'
+
+
+class FrameCapture():
+    """ Save the frames the game draws to disk from a background thread.
+
+    capture() copies the frame's pixels and hands them to the writer through a bounded
+    queue, so the game loop never waits on compression or the disk. When the writer falls
+    behind and the queue is full, the frame is dropped and counted instead (unless block is
+    set, for replays, which aren't real time and can wait). close() writes info.json next
+    to the frames: their size, frame rate, format and how many were dropped.
+    """
+
+    def __init__(self, path, frame_format=PNG, queue_size=8, fps=60, block=False):
+        """ Start writing frames into the directory at path. """
+        if frame_format not in (PNG, RAW):
+            raise ValueError("unknown capture format '{}'".format(frame_format))
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.frame_format = frame_format
+        self.fps = fps
+        self.block = block
+
+        # Frames offered, written and dropped, and the size of the last one
+        self.frames = 0
+        self.written = 0
+        self.dropped = 0
+        self.size = None
+
+        # (size, RGB bytes) of frames waiting to be written; None tells the writer to stop
+        self.queue = queue.Queue(queue_size)
+        self.thread = threading.Thread(target=self._run, name='frame-capture', daemon=True)
+        self.thread.start()
+
+        # sys.exit() (closing the window) still writes out whatever is queued
+        atexit.register(self.close)
+
+    def capture(self, surface):
+        """ Queue a copy of surface to be written, or drop it if the writer is behind. """
+        self.frames += 1
+        if not self.block and self.queue.full():
+            # Don't even copy a frame there's no room for
+            self.dropped += 1
+            return
+
+        self.size = surface.get_size()
+        try:
+            self.queue.put((self.size, pygame.image.tobytes(surface, 'RGB')), self.block)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        """ Write the queued frames and info.json, and stop the writer. """
+        if not self.thread.is_alive():
+            return
+        self.queue.put(None)
+        self.thread.join()
+
+        info = {
+            'format': self.frame_format,
+            'fps': self.fps,
+            'frames': self.written,
+            'dropped': self.dropped,
+        }
+        if self.size is not None:
+            info['width'], info['height'] = self.size
+        if self.frame_format == RAW:
+            info['pixel_format'] = 'rgb24'
+        with open(os.path.join(self.path, 'info.json'), 'w') as file:
+            json.dump(info, file, indent=2)
+
+    def _run(self):
+        """ The writer thread: save frames as they arrive until told to stop. """
+        raw_file = None
+        if self.frame_format == RAW:
+            raw_file = open(os.path.join(self.path, 'frames.rgb'), 'wb')
+
+        while True:
+            frame = self.queue.get()
+            if frame is None:
+                break
+            size, pixels = frame
+            if raw_file is not None:
+                raw_file.write(pixels)
+            else:
+                # Numbered by frames written, so an encoder reading the sequence finds no gaps
+                image = pygame.image.frombytes(pixels, size, 'RGB')
+                pygame.image.save(image, os.path.join(self.path,
+                                                      'frame{:06d}.png'.format(self.written)))
+            self.written += 1
+
+        if raw_file is not None:
+            raw_file.close()
@@ -0,0 +1,134 @@
+def formation_range(start, end, origin, pitch, size, count):
+    """ Return the formation indices along one axis whose aliens can overlap [start, end).
+
+    Alien i of the formation covers [origin + i * pitch, origin + i * pitch + size). Aliens
+    keep their own float positions, so one rounds a pixel differently now and then; a pixel
+    of slack on each side keeps those in range, and callers do the exact rect test.
+    """
+    first = max(int((start - 1 - origin - size) // pitch), 0)
+    last = min(int((end + 1 - origin) // pitch), count - 1)
+    return range(first, last + 1)
+
+
+class FormationGrid():
+    """ A uniform grid laid over the fleet's formation, for finding the aliens near a rect.
+
+    create_alien() spaces aliens one alien apart, so each cell is one formation slot and
+    holds at most one alien. The fleet moves as a rigid body, so the grid never has to be
+    rebuilt: cells are relative to the fleet's origin, and only deaths update the grid.
+    """
+
+    def __init__(self, item_width, item_height):
+        """ Initialize an empty grid for items of the given size. """
+        self.item_width = item_width
+        self.item_height = item_height
+
+        # Spacing between each alien is equal to one alien width (and one height between rows)
+        self.pitch_x = 2 * item_width
+        self.pitch_y = 2 * item_height
+
+        # (alien_number, row_number) -> item, and how many columns and rows are in use
+        self.cells = {}
+        self.columns = 0
+        self.rows = 0
+
+    def insert(self, item, alien_number, row_number):
+        """ Put item in its formation slot. """
+        self.cells[(alien_number, row_number)] = item
+        self.columns = max(self.columns, alien_number + 1)
+        self.rows = max(self.rows, row_number + 1)
+
+    def remove(self, alien_number, row_number):
+        """ Empty a formation slot. """
+        self.cells.pop((alien_number, row_number), None)
+
+    def clear(self):
+        """ Empty every slot. """
+        self.cells.clear()
+        self.columns = 0
+        self.rows = 0
+
+    def origin(self, item):
+        """ Return where slot (0, 0) is now, worked out from any item still in the grid. """
+        return (item.rect.x - item.alien_number * self.pitch_x,
+                item.rect.y - item.row_number * self.pitch_y)
+
+    def query(self, rect, origin):
+        """ Return the items in the slots rect could overlap (before an exact rect test). """
+        origin_x, origin_y = origin
+        found = []
+        for row_number in formation_range(rect.top, rect.bottom, origin_y, self.pitch_y,
+                                          self.item_height, self.rows):
+            for alien_number in formation_range(rect.left, rect.right, origin_x, self.pitch_x,
+                                                self.item_width, self.columns):
+                item = self.cells.get((alien_number, row_number))
+                if item is not None:
+                    found.append(item)
+        return found
+
+
+class FleetBounds():
+    """ How many aliens are alive in each formation column and row, and the outermost
+    columns and rows that still have any.
+
+    The fleet moves as a rigid body, so the aliens in those slots give its bounding box: the
+    edge and bottom checks test the box instead of every alien, and only deaths (and new
+    aliens) update the counts. (Each alien rounds its own float x to a pixel, so the box's
+    sides are read from aliens in the outermost columns rather than worked out from one.)
+    """
+
+    def __init__(self):
+        """ Initialize the bounds of an empty fleet. """
+        self.column_counts = []
+        self.row_counts = []
+        self.count = 0
+
+        # The live slots span columns first_column..last_column and rows first_row..last_row
+        self.first_column = 0
+        self.last_column = 0
+        self.first_row = 0
+        self.last_row = 0
+
+    def fill(self, columns, rows):
+        """ Count a full formation of rows by columns aliens. """
+        self.column_counts = [rows] * columns
+        self.row_counts = [columns] * rows
+        self.count = columns * rows
+        self.first_column = 0
+        self.last_column = columns - 1
+        self.first_row = 0
+        self.last_row = rows - 1
+
+    def insert(self, alien_number, row_number):
+        """ Count one alien in its slot. """
+        for counts, index in ((self.column_counts, alien_number), (self.row_counts, row_number)):
+            if index >= len(counts):
+                counts.extend([0] * (index + 1 - len(counts)))
+            counts[index] += 1
+
+        if self.count:
+            self.first_column = min(self.first_column, alien_number)
+            self.last_column = max(self.last_column, alien_number)
+            self.first_row = min(self.first_row, row_number)
+            self.last_row = max(self.last_row, row_number)
+        else:
+            self.first_column = self.last_column = alien_number
+            self.first_row = self.last_row = row_number
+        self.count += 1
+
+    def remove(self, alien_number, row_number):
+        """ Stop counting one alien, and move the outermost column and row in past any that
+        emptied. Each is passed over once per fleet, so this is O(1) amortized. """
+        self.column_counts[alien_number] -= 1
+        self.row_counts[row_number] -= 1
+        self.count -= 1
+        if not self.count:
+            return
+        while not self.column_counts[self.first_column]:
+            self.first_column += 1
+        while not self.column_counts[self.last_column]:
+            self.last_column -= 1
+        while not self.row_counts[self.first_row]:
+            self.first_row += 1
+        while not self.row_counts[self.last_row]:
+            self.last_row -= 1
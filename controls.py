@@ -0,0 +1,53 @@
+import pygame
+
+# The actions keys can be bound to in Settings.keymap. The held ones are also the names of
+# the InputState flags they set while their key is down.
+MOVING_RIGHT = 'moving_right'
+MOVING_LEFT = 'moving_left'
+FIRING = 'firing'
+TOGGLE_PROFILER = 'toggle_profiler'
+SAVE_PROFILE = 'save_profile'
+HELD_ACTIONS = (MOVING_RIGHT, MOVING_LEFT, FIRING)
+
+# Events after which the window's contents may have been lost (it was uncovered or
+# restored), so the renderer must repaint all of it. pygame 1 only has VIDEOEXPOSE, and
+# pygame 2 also sends the SDL2 window events; whichever this pygame has are used.
+REPAINT_EVENTS = [getattr(pygame, name) for name in ('VIDEOEXPOSE', 'WINDOWEXPOSED',
+                                                     'WINDOWRESTORED', 'WINDOWSHOWN')
+                  if hasattr(pygame, name)]
+
+# The only events check_events() reads. Everything else (mouse motion, other window
+# events, text events, ...) is dropped by SDL before it's queued, so it costs nothing to ignore.
+ALLOWED_EVENTS = [pygame.QUIT, pygame.KEYDOWN, pygame.KEYUP, pygame.MOUSEBUTTONDOWN] + REPAINT_EVENTS
+
+
+def filter_events():
+    """ Let only ALLOWED_EVENTS into the event queue. Call once the display is initialized. """
+    pygame.event.set_blocked(None)
+    pygame.event.set_allowed(ALLOWED_EVENTS)
+
+
+def rebind(keymap, action, key):
+    """ Bind key to action in keymap, in place of whatever keys did it before. """
+    for bound in [bound for bound, bound_action in keymap.items() if bound_action == action]:
+        del keymap[bound]
+    keymap[key] = action
+
+
+class InputState():
+    """ Which controls are held down, as the simulation sees them.
+
+    Key events only change these flags; the ship moves and auto fire repeats from them each
+    step, so holding a key needs no events beyond its press and release.
+    """
+
+    __slots__ = ('moving_right', 'moving_left', 'firing', 'fire_time')
+
+    def __init__(self):
+        """ Start with nothing held. """
+        self.moving_right = False
+        self.moving_left = False
+        self.firing = False
+
+        # Seconds the fire key has been held since its last shot
+        self.fire_time = 0.0
@@ -0,0 +1,63 @@
+from pygame.sprite import Sprite
+
+
+class Entity(Sprite):
+    """ A lighter Sprite for the game's many small objects (aliens, bullets).
+
+    Sprite keeps the groups it's in as a set, over 200 bytes even for one group, in the
+    instance's __dict__. An entity keeps them in a list, in its own slot, and overrides every
+    Sprite method that touches the groups, so it never relies on how Sprite stores them.
+    """
+
+    __slots__ = ('group_list',)
+
+    def __init__(self, *groups):
+        """ Start in no groups (or in groups). """
+        self.group_list = []
+        if groups:
+            self.add(*groups)
+
+    def add(self, *groups):
+        """ Add the entity to the groups it isn't in yet (nested sequences of groups too). """
+        for group in groups:
+            if hasattr(group, '_spritegroup'):
+                if group not in self.group_list:
+                    group.add_internal(self)
+                    self.add_internal(group)
+            else:
+                self.add(*group)
+
+    def remove(self, *groups):
+        """ Remove the entity from those of the groups it is in. """
+        for group in groups:
+            if hasattr(group, '_spritegroup'):
+                if group in self.group_list:
+                    group.remove_internal(self)
+                    self.remove_internal(group)
+            else:
+                self.remove(*group)
+
+    def add_internal(self, group):
+        """ Note that the entity is in group (Group.add() calls this). """
+        self.group_list.append(group)
+
+    def remove_internal(self, group):
+        """ Note that the entity has left group (Group.remove() calls this). """
+        self.group_list.remove(group)
+
+    def kill(self):
+        """ Remove the entity from every group it is in. """
+        for group in self.group_list:
+            group.remove_internal(self)
+        self.group_list.clear()
+
+    def groups(self):
+        """ Return a list of the groups the entity is in. """
+        return list(self.group_list)
+
+    def alive(self):
+        """ Return True if the entity is in any group. """
+        return bool(self.group_list)
+
+    def __repr__(self):
+        return "<{} Entity(in {} groups)>".format(self.__class__.__name__, len(self.group_list))
@@ -0,0 +1,529 @@
+import pygame
+from pygame.sprite import Group
+import assets
+from alien import Alien
+from collisions import FormationGrid, FleetBounds, formation_range
+
+# NumPy is only needed for the array fleet; the Group fleet works without it.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Formations already worked out, keyed by screen size and sprite sizes (see
+# game_functions.get_formation()). The layout never changes for a given key.
+formations = {}
+
+
+class Formation():
+    """ Where every alien of a full fleet starts, laid out like game_functions.create_alien().
+
+    Fleets restore themselves from a Formation in one go instead of placing each alien.
+    """
+
+    def __init__(self, number_aliens_x, number_rows, alien_width, alien_height):
+        """ Lay out number_rows full rows of number_aliens_x aliens. """
+        self.columns = number_aliens_x
+        self.rows = number_rows
+        self.alien_width = alien_width
+        self.alien_height = alien_height
+
+        # (alien_number, row_number, x, y) for every slot, row by row
+        self.slots = [(alien_number, row_number, alien_width + 2 * alien_width * alien_number,
+                       alien_height + 2 * alien_height * row_number)
+                      for row_number in range(number_rows) for alien_number in range(number_aliens_x)]
+        if np is not None:
+            self.x = np.array([slot[2] for slot in self.slots], dtype=np.float64)
+            self.y = np.array([slot[3] for slot in self.slots], dtype=np.int64)
+
+        self.surface = None
+
+    def __len__(self):
+        return len(self.slots)
+
+    def bake(self, image):
+        """ Return one transparent surface with image drawn in every slot, made the first
+        time it is asked for. Its topleft is slot (0, 0). """
+        if self.surface is None:
+            self.surface = pygame.Surface((max(0, self.columns * 2 - 1) * self.alien_width,
+                                           max(0, self.rows * 2 - 1) * self.alien_height),
+                                          pygame.SRCALPHA)
+            # Slots never overlap, so MAX copies each pixel onto the transparent surface exactly
+            self.surface.blits([(image, self.slot_rect(alien_number, row_number), None,
+                                 pygame.BLEND_RGBA_MAX)
+                                for alien_number, row_number, x, y in self.slots], False)
+        return self.surface
+
+    def slot_rect(self, alien_number, row_number):
+        """ Return the area of a slot on the baked surface. """
+        return pygame.Rect(2 * self.alien_width * alien_number, 2 * self.alien_height * row_number,
+                           self.alien_width, self.alien_height)
+
+
+def make_fleet(ai_settings, screen):
+    """ Return an empty alien container for the backend chosen in settings. """
+    if ai_settings.fleet_backend == 'array':
+        if np is None:
+            raise ImportError("fleet_backend 'array' needs NumPy: pip install numpy")
+        return ArrayFleet(ai_settings, screen)
+    elif ai_settings.fleet_backend == 'sprite':
+        return SpriteFleet(ai_settings)
+    return Group()
+
+
+class SpriteFleet(Group):
+    """ A Group of aliens that also files each alien in its formation slot.
+
+    Collision checks only look at the slots near a rect instead of testing every alien.
+    Aliens must come from game_functions.create_alien(), which gives them their slot.
+    Aliens that are removed go on a free list, and new_alien() hands them out again, so
+    a new fleet reuses the last one's aliens instead of allocating new ones.
+    """
+
+    def __init__(self, ai_settings, *sprites):
+        """ Initialize the fleet; the grid is sized by the first alien added. """
+        self.ai_settings = ai_settings
+        self.grid = None
+        self.free = []
+
+        # Alive counts per column and row, for the fleet's bounding box, and a live alien
+        # in its first and last columns (the one found last time, while it's alive)
+        self.bounds = FleetBounds()
+        self.edge_aliens = [None, None]
+
+        # With Settings.prebaked_fleet, the formation the fleet was restored from and this
+        # fleet's copy of its baked surface (dead aliens are erased from it, in place, so
+        # baked_revision counts the erasures for anything that caches the surface's pixels)
+        self.formation = None
+        self.baked = None
+        self.baked_revision = 0
+
+        # Any alien still in the fleet; its rect tells the grid where the formation is now
+        self.anchor = None
+        super(SpriteFleet, self).__init__(*sprites)
+
+    def add_internal(self, sprite, layer=None):
+        """ Add the alien to the Group and to its grid slot. """
+        super(SpriteFleet, self).add_internal(sprite)
+        if self.grid is None:
+            self.grid = FormationGrid(sprite.rect.width, sprite.rect.height)
+        self.grid.insert(sprite, sprite.alien_number, sprite.row_number)
+        self.bounds.insert(sprite.alien_number, sprite.row_number)
+        if self.anchor is None:
+            self.anchor = sprite
+
+    def remove_internal(self, sprite):
+        """ Remove the alien from the Group and from its grid slot (kill() ends up here). """
+        super(SpriteFleet, self).remove_internal(sprite)
+        self.grid.remove(sprite.alien_number, sprite.row_number)
+        self.bounds.remove(sprite.alien_number, sprite.row_number)
+        if sprite is self.anchor:
+            self.anchor = next(iter(self.spritedict), None)
+        if self.anchor is None:
+            self.grid.clear()
+        if self.baked is not None:
+            self.baked.fill((0, 0, 0, 0), self.formation.slot_rect(sprite.alien_number, sprite.row_number))
+            self.baked_revision += 1
+        self.free.append(sprite)
+
+    def empty(self):
+        """ Remove every alien (there's no baked surface left to erase them from). """
+        self.baked = None
+        super(SpriteFleet, self).empty()
+
+    def restore(self, formation, ai_settings, screen):
+        """ Replace the fleet with a full formation, reusing removed aliens. """
+        self.empty()
+        aliens = []
+        for alien_number, row_number, x, y in formation.slots:
+            alien = self.new_alien(ai_settings, screen)
+            alien.x = x
+            alien.previous_x = x
+            alien.rect.x = x
+            alien.rect.y = y
+            alien.alien_number = alien_number
+            alien.row_number = row_number
+            aliens.append(alien)
+        self.add(*aliens)
+
+        self.formation = formation
+        if ai_settings.prebaked_fleet and aliens:
+            self.baked = formation.bake(aliens[0].image).copy()
+
+    def update(self):
+        """ Move every alien by the fleet's step, as Alien.update() does, with the step read
+        once for the whole fleet and no method call per alien. """
+        step = self.ai_settings.alien_step
+        for alien in self.spritedict:
+            alien.previous_x = x = alien.x
+            alien.x = x = x + step
+            alien.rect.x = x
+
+    def new_alien(self, ai_settings, screen):
+        """ Return an alien that isn't in the fleet, reusing a removed one if there is one. """
+        if self.free:
+            return self.free.pop()
+        return Alien(ai_settings, screen)
+
+    def nearby(self, rect):
+        """ Return the aliens whose slots rect could overlap. """
+        if self.anchor is None:
+            return []
+        return self.grid.query(rect, self.grid.origin(self.anchor))
+
+    def edge_alien(self, side, alien_number):
+        """ Return a live alien in column alien_number (every alien in a column has the same x),
+        looking down the column only when the one found last time has gone. """
+        alien = self.edge_aliens[side]
+        if alien is None or alien.alien_number != alien_number or alien not in self.spritedict:
+            cells = self.grid.cells
+            for row_number in range(self.grid.rows):
+                alien = cells.get((alien_number, row_number))
+                if alien is not None:
+                    break
+            self.edge_aliens[side] = alien
+        return alien
+
+    def box(self):
+        """ Return the (left, top, right, bottom) of the live aliens. """
+        bounds = self.bounds
+        anchor = self.anchor
+        top = anchor.rect.top + (bounds.first_row - anchor.row_number) * self.grid.pitch_y
+        bottom = anchor.rect.bottom + (bounds.last_row - anchor.row_number) * self.grid.pitch_y
+        return (self.edge_alien(0, bounds.first_column).rect.left, top,
+                self.edge_alien(1, bounds.last_column).rect.right, bottom)
+
+    def check_edges(self, right):
+        """ Return True if any alien is at the left edge of the screen or at right. """
+        if self.anchor is None:
+            return False
+        left, top, box_right, bottom = self.box()
+        return box_right >= right or left <= 0
+
+    def reached_bottom(self, bottom):
+        """ Return True if any alien has reached bottom. """
+        return self.anchor is not None and self.box()[3] >= bottom
+
+    def blit_sequence(self, alpha=1.0):
+        """ Return (image, topleft) pairs for the aliens, alpha of the way from their last step.
+        With a baked fleet that is one pair, placed by the anchor (the fleet moves as one). """
+        if self.baked is not None and self.anchor is not None:
+            x, y = self.anchor.interpolated_topleft(alpha)
+            slot = self.formation.slot_rect(self.anchor.alien_number, self.anchor.row_number)
+            return [(self.baked, (x - slot.x, y - slot.y))]
+        return [(alien.image, alien.interpolated_topleft(alpha)) for alien in self.sprites()]
+
+    def draw(self, surface, alpha=1.0):
+        """ Draw the whole fleet with one blits() call. """
+        surface.blits(self.blit_sequence(alpha), False)
+
+    def collide_rect(self, rect):
+        """ Return True if any alien overlaps rect. """
+        for alien in self.nearby(rect):
+            if alien.rect.colliderect(rect):
+                return True
+        return False
+
+    def collide_bullets(self, bullets):
+        """ Kill every alien a bullet hits.
+
+        Returns the same dictionary as pygame.sprite.groupcollide(bullets, aliens, False, True).
+        """
+        collisions = {}
+        if self.anchor is None:
+            return collisions
+
+        # Only bullets inside the fleet's bounding box can hit anything, and pygame picks
+        # those out in one call; the box only shrinks as aliens die, so it stays safe to use
+        sprites = bullets.sprites()
+        left, top, right, bottom = self.box()
+        area = pygame.Rect(left, top, right - left, bottom - top)
+        for index in area.collidelistall([bullet.rect for bullet in sprites]):
+            bullet = sprites[index]
+            hit = [alien for alien in self.nearby(bullet.rect) if alien.rect.colliderect(bullet.rect)]
+            if hit:
+                for alien in hit:
+                    alien.kill()
+                collisions[bullet] = hit
+        return collisions
+
+
+class ArrayFleet():
+    """ A fleet of aliens stored as NumPy arrays instead of one Sprite per alien.
+
+    Every alien shares one image, so the fleet only keeps positions and alive flags.
+    The fleet supports the parts of the Group interface the game uses (len(), empty(),
+    update()), and each per-alien loop in game_functions becomes a single array
+    operation here.
+    """
+
+    def __init__(self, ai_settings, screen):
+        """ Initialize an empty fleet. """
+        self.ai_settings = ai_settings
+        self.screen = screen
+        self.image = assets.load_image('spaceship.png')
+        self.width, self.height = self.image.get_size()
+
+        # Exact x positions (and where they were one step ago), rows and alive flags
+        self.x = np.zeros(0)
+        self.previous_x = np.zeros(0)
+        self.y = np.zeros(0, dtype=np.int64)
+        self.alive = np.zeros(0, dtype=bool)
+        self.count = 0
+
+        # Set when the fleet is a full formation (restore()); alien i sits in slot
+        # (i % columns, i // columns), so collisions only need to test nearby slots.
+        self.columns = None
+        self.rows = None
+        self.anchor = 0
+
+        # Alive counts per column and row of the formation, for the fleet's bounding box
+        self.bounds = FleetBounds()
+
+        # With Settings.prebaked_fleet, the formation and this fleet's copy of its baked
+        # surface (dead aliens are erased from it in place; baked_revision counts erasures)
+        self.formation = None
+        self.baked = None
+        self.baked_revision = 0
+
+    def __len__(self):
+        """ Return how many aliens are still alive. """
+        return self.count
+
+    def set_positions(self, xs, ys):
+        """ Replace the fleet with live aliens at the given top-left positions. """
+        self.x = np.array(xs, dtype=np.float64)
+        self.previous_x = self.x.copy()
+        self.y = np.array(ys, dtype=np.int64)
+        self.alive = np.ones(len(self.x), dtype=bool)
+        self.count = len(self.x)
+        self.columns = None
+        self.rows = None
+        self.anchor = 0
+        self.formation = None
+        self.baked = None
+
+    def restore(self, formation):
+        """ Replace the fleet with a full formation, copying into the arrays already there
+        when the fleet is the same size. """
+        if len(self.x) == len(formation):
+            self.x[:] = formation.x
+            self.previous_x[:] = formation.x
+            self.y[:] = formation.y
+            self.alive[:] = True
+        else:
+            self.x = formation.x.copy()
+            self.previous_x = formation.x.copy()
+            self.y = formation.y.copy()
+            self.alive = np.ones(len(formation), dtype=bool)
+        self.count = len(formation)
+        self.columns = formation.columns
+        self.rows = formation.rows
+        self.anchor = 0
+        self.bounds.fill(self.columns, self.rows)
+
+        self.formation = formation
+        self.baked = None
+        if self.ai_settings.prebaked_fleet and self.count:
+            self.baked = formation.bake(self.image).copy()
+
+    def empty(self):
+        """ Remove every alien. """
+        self.set_positions([], [])
+
+    def update(self):
+        """ Move the whole fleet left or right by one time step. """
+        self.previous_x[:] = self.x
+        self.x += self.ai_settings.alien_step
+
+    def rect_x(self, x):
+        """ Round exact x positions to rect positions the way pygame.Rect does (half away from 0). """
+        return np.trunc(x + np.copysign(.5, x)).astype(np.int64)
+
+    def left(self):
+        """ Return the rect x positions of the live aliens. """
+        return self.rect_x(self.x[self.alive])
+
+    def box(self):
+        """ Return the (left, top, right, bottom) of the live aliens of a full formation. Dead
+        aliens keep moving with the rest, so a column's first slot always has its x. """
+        bounds = self.bounds
+        anchor = self.anchor
+        top = int(self.y[anchor]) + (bounds.first_row - anchor // self.columns) * 2 * self.height
+        bottom = (int(self.y[anchor]) + (bounds.last_row - anchor // self.columns) * 2 * self.height
+                  + self.height)
+        return (int(self.rect_x(self.x[bounds.first_column])), top,
+                int(self.rect_x(self.x[bounds.last_column])) + self.width, bottom)
+
+    def check_edges(self, right):
+        """ Return True if any live alien is at the left edge of the screen or at right. """
+        if not self.count:
+            return False
+        if self.columns is not None:
+            left, top, box_right, bottom = self.box()
+            return box_right >= right or left <= 0
+
+        left = self.left()
+        return bool(left.max() + self.width >= right or left.min() <= 0)
+
+    def drop(self, distance):
+        """ Move the whole fleet down. """
+        self.y += int(distance)
+
+    def reached_bottom(self, bottom):
+        """ Return True if any live alien has reached bottom. """
+        if not self.count:
+            return False
+        if self.columns is not None:
+            return self.box()[3] >= bottom
+        return bool((self.y[self.alive] + self.height >= bottom).any())
+
+    def _overlapping(self, rect):
+        """ Return a mask of the live aliens overlapping rect. """
+        left = self.rect_x(self.x)
+        return (self.alive & (left < rect.right) & (left + self.width > rect.left)
+                & (self.y < rect.bottom) & (self.y + self.height > rect.top))
+
+    def _nearby(self, rect):
+        """ Return the indices of the live aliens overlapping rect. """
+        if self.columns is None:
+            return np.flatnonzero(self._overlapping(rect))
+
+        # Find the formation slots around rect from any live alien's position
+        origin_x, origin_y = self._origin()
+        hit = []
+        for row_number in formation_range(rect.top, rect.bottom, origin_y, 2 * self.height,
+                                          self.height, self.rows):
+            for alien_number in formation_range(rect.left, rect.right, origin_x, 2 * self.width,
+                                                self.width, self.columns):
+                i = row_number * self.columns + alien_number
+                if self.alive[i] and rect.colliderect(self.rect_x(self.x[i]), self.y[i],
+                                                      self.width, self.height):
+                    hit.append(i)
+        return hit
+
+    def _origin(self):
+        """ Return where slot (0, 0) of a full formation is now, from any live alien. """
+        anchor = self.anchor
+        return (int(self.rect_x(self.x[anchor])) - (anchor % self.columns) * 2 * self.width,
+                int(self.y[anchor]) - (anchor // self.columns) * 2 * self.height)
+
+    def _slot_range(self, start, end, origin, pitch, size, count):
+        """ formation_range() for arrays of starts and ends: the first and last index along
+        one axis each span can overlap (first > last when there are none). """
+        first = np.maximum((start - 1 - origin - size) // pitch, 0)
+        last = np.minimum((end + 1 - origin) // pitch, count - 1)
+        return first, last
+
+    def _bullet_hits(self, rects):
+        """ Return (bullet, alien) index pairs for every live alien each (x, y, width, height)
+        row of rects overlaps, looking only at the slots around each rect. Every bullet is
+        tested at once for each slot offset, so there is no Python loop over bullets. """
+        left, top = rects[:, 0], rects[:, 1]
+        right, bottom = left + rects[:, 2], top + rects[:, 3]
+        origin_x, origin_y = self._origin()
+        first_column, last_column = self._slot_range(left, right, origin_x, 2 * self.width,
+                                                     self.width, self.columns)
+        first_row, last_row = self._slot_range(top, bottom, origin_y, 2 * self.height,
+                                               self.height, self.rows)
+
+        bullet_indices = []
+        alien_indices = []
+        for column_offset in range(max(int((last_column - first_column).max()) + 1, 0)):
+            for row_offset in range(max(int((last_row - first_row).max()) + 1, 0)):
+                alien_number = first_column + column_offset
+                row_number = first_row + row_offset
+                in_range = (alien_number <= last_column) & (row_number <= last_row)
+                i = np.where(in_range, row_number * self.columns + alien_number, 0)
+                alien_x = self.rect_x(self.x[i])
+                alien_y = self.y[i]
+                hit = np.flatnonzero(in_range & self.alive[i]
+                                     & (alien_x < right) & (alien_x + self.width > left)
+                                     & (alien_y < bottom) & (alien_y + self.height > top))
+                bullet_indices.append(hit)
+                alien_indices.append(i[hit])
+        return np.concatenate(bullet_indices), np.concatenate(alien_indices)
+
+    def _kill(self, hit):
+        """ Mark the aliens at the indices in hit as dead. """
+        self.alive[hit] = False
+        self.count -= len(hit)
+        if self.columns is not None:
+            for i in hit:
+                self.bounds.remove(int(i) % self.columns, int(i) // self.columns)
+        if self.baked is not None:
+            for i in hit:
+                slot = self.formation.slot_rect(int(i) % self.columns, int(i) // self.columns)
+                self.baked.fill((0, 0, 0, 0), slot)
+            self.baked_revision += 1
+        if self.count and not self.alive[self.anchor]:
+            self.anchor = int(np.argmax(self.alive))
+
+    def collide_rect(self, rect):
+        """ Return True if any live alien overlaps rect. """
+        return bool(self.count and len(self._nearby(rect)))
+
+    def collide_bullets(self, bullets):
+        """ Kill every alien a bullet hits.
+
+        Returns the same shape as pygame.sprite.groupcollide(bullets, aliens, False, True):
+        each bullet that hit something maps to a list (here, the rects of the aliens it killed).
+        """
+        collisions = {}
+        if not self.count:
+            return collisions
+        sprites = bullets.sprites()
+        if self.columns is None:
+            for bullet in sprites:
+                if not self.count:
+                    break
+                hit = self._nearby(bullet.rect)
+                if len(hit):
+                    self._kill(hit)
+                    collisions[bullet] = [pygame.Rect(self.x[i], self.y[i], self.width, self.height)
+                                          for i in hit]
+            return collisions
+
+        # Only bullets inside the fleet's bounding box can hit anything; pygame picks those
+        # out in one call, and the rest of the lookup is done on all of them at once
+        rects = [bullet.rect for bullet in sprites]
+        left, top, right, bottom = self.box()
+        near = pygame.Rect(left, top, right - left, bottom - top).collidelistall(rects)
+        if not near:
+            return collisions
+        bullet_indices, alien_indices = self._bullet_hits(np.array([rects[i] for i in near],
+                                                                   dtype=np.int64))
+        if not len(alien_indices):
+            return collisions
+
+        # As with bullets tested one by one, an alien hit by several bullets is killed by the
+        # first of them in the group's order
+        order = np.lexsort((alien_indices, bullet_indices))
+        bullet_indices, alien_indices = bullet_indices[order], alien_indices[order]
+        first_hits = np.sort(np.unique(alien_indices, return_index=True)[1])
+        bullet_indices, alien_indices = bullet_indices[first_hits], alien_indices[first_hits]
+
+        self._kill(alien_indices)
+        for bullet_index, i in zip(bullet_indices.tolist(), alien_indices.tolist()):
+            collisions.setdefault(sprites[near[bullet_index]], []).append(
+                pygame.Rect(self.x[i], self.y[i], self.width, self.height))
+        return collisions
+
+    def blit_sequence(self, alpha=1.0):
+        """ Return (image, topleft) pairs for the live aliens, alpha of the way from their last step.
+        With a baked fleet that is one pair, placed by the anchor (the fleet moves as one). """
+        if self.baked is not None and self.count:
+            anchor = self.anchor
+            x = int(self.previous_x[anchor] + (self.x[anchor] - self.previous_x[anchor]) * alpha)
+            slot = self.formation.slot_rect(anchor % self.columns, anchor // self.columns)
+            return [(self.baked, (x - slot.x, int(self.y[anchor]) - slot.y))]
+
+        x = self.previous_x[self.alive]
+        x += (self.x[self.alive] - x) * alpha
+        return [(self.image, topleft) for topleft in zip(x.astype(np.int64).tolist(),
+                                                         self.y[self.alive].tolist())]
+
+    def draw(self, surface, alpha=1.0):
+        """ Draw the whole fleet with one blits() call. """
+        surface.blits(self.blit_sequence(alpha), False)
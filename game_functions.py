@@ -1,88 +1,171 @@
 import sys
 import pygame
-from bullet import Bullet
+from bullet import Bullet, BulletGroup
 from alien import Alien
-from time import sleep
+from fleet import ArrayFleet, SpriteFleet, Formation, formations
+from renderer import present
+from scheduler import PLAYING, RESPAWN_PAUSE, LEVEL_TRANSITION, GAME_OVER
+from controls import HELD_ACTIONS, FIRING, TOGGLE_PROFILER, SAVE_PROFILE, REPAINT_EVENTS
+import assets
 
 def check_keydown_events(event, ai_settings, screen, ship, bullets):
-    """ Respond to key presses. """
+    """ Respond to key presses, by the action the keymap binds each key to. """
+    action = ai_settings.keymap.get(event.key)
 
-    if event.key == pygame.K_RIGHT:
-        ship.moving_right = True
+    # Held actions only set the ship's input state; the simulation acts on it every step
+    if action in HELD_ACTIONS:
+        setattr(ship.controls, action, True)
 
-    elif event.key == pygame.K_LEFT:
-        ship.moving_left = True
+        # The first shot is fired on the press itself, auto fire repeats it while held
+        if action == FIRING:
+            ship.controls.fire_time = 0.0
+            fire_bullet(ai_settings, screen, ship, bullets)
 
-    elif event.key == pygame.K_SPACE:
-        fire_bullet(ai_settings, screen, ship, bullets)
+    elif action == TOGGLE_PROFILER:
+        ai_settings.show_profiler = not ai_settings.show_profiler
+
+    elif action == SAVE_PROFILE:
+        ai_settings.save_profile = True
 
 def fire_bullet(ai_settings, screen, ship, bullets):
     """ Fire a bullet if limit not reached yet. """
 
     # Create a new bullet and add it to the bullets group.
+    # A BulletGroup reuses a bullet that has already left the screen when it can
     if len(bullets) < ai_settings.bullets_allowed:
-        new_bullet = Bullet(ai_settings, screen, ship)
-        bullets.add(new_bullet)
+        if isinstance(bullets, BulletGroup):
+            bullets.fire(ai_settings, screen, ship)
+        else:
+            new_bullet = Bullet(ai_settings, screen, ship)
+            bullets.add(new_bullet)
+
+def auto_fire(ai_settings, screen, ship, bullets):
+    """ Fire again every auto_fire_interval seconds the fire key is held. """
+    controls = ship.controls
+    controls.fire_time += ai_settings.time_step
+
+    # Rounded to whole steps, like the scheduler's pauses
+    if controls.fire_time > ai_settings.auto_fire_interval - ai_settings.time_step / 2:
+        controls.fire_time = 0.0
+        fire_bullet(ai_settings, screen, ship, bullets)
 
-def check_keyup_events(event, ship):
+def check_keyup_events(event, ai_settings, ship):
     """ Respond to key releases """
+    action = ai_settings.keymap.get(event.key)
+    if action in HELD_ACTIONS:
+        setattr(ship.controls, action, False)
 
-    if event.key == pygame.K_RIGHT:
-        ship.moving_right = False
-
-    elif event.key == pygame.K_LEFT:
-        ship.moving_left = False
-
-def check_events(ai_settings, screen, stats, sb, play_button, ship, aliens, bullets):
-    """ Respond to key presses and mouse events."""
+def check_events(ai_settings, screen, stats, sb, play_button, ship, aliens, bullets, recorder=None,
+                 renderer=None):
+    """ Respond to key presses and mouse events. If a recorder is given, every input acted on
+    is recorded, and the recording is saved when the game quits. A renderer is told to
+    repaint the whole window when the window system may have lost what was on it. """
 
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            if recorder is not None:
+                recorder.save(stats)
             sys.exit()
 
         elif event.type == pygame.KEYDOWN:
+            if recorder is not None:
+                recorder.record_key(event)
             check_keydown_events(event, ai_settings, screen, ship, bullets)
 
         elif event.type == pygame.KEYUP:
-            check_keyup_events(event, ship)
+            if recorder is not None:
+                recorder.record_key(event)
+            check_keyup_events(event, ai_settings, ship)
 
         elif event.type == pygame.MOUSEBUTTONDOWN:
-            # mouse.get_pos() returns tuple containing x,y cords of mouse cursor when clicked
-
-            mouse_x, mouse_y = pygame.mouse.get_pos()
+            # event.pos is where the mouse was when it was clicked (motion events aren't queued)
+
+            # The window shows the game display_scale times larger than it's laid out
+            mouse_x, mouse_y = event.pos
+            mouse_x //= ai_settings.display_scale
+            mouse_y //= ai_settings.display_scale
+            if recorder is not None:
+                recorder.record_click(mouse_x, mouse_y)
             check_play_button(ai_settings, screen, stats, sb, play_button, ship, aliens, bullets, mouse_x, mouse_y)
 
+        elif event.type in REPAINT_EVENTS:
+            # Without a compositor, an uncovered window shows garbage until it's redrawn, and
+            # the dirty renderer would otherwise only redraw what moved
+            if renderer is not None:
+                renderer.invalidate()
+
 def check_play_button(ai_settings, screen, stats, sb, play_button, ship, aliens, bullets, mouse_x, mouse_y):
     """ Start a new game when the player clicks Play. """
 
     # We use collidepoint to check if the point of the mouse click overlaps region defined by Play Button's rect/
     button_clicked = play_button.rect.collidepoint(mouse_x, mouse_y)
     if button_clicked and not stats.game_active:
-
-        ai_settings.initialize_dynamic_settings()
         pygame.mouse.set_visible(False)
-
-        # Reset the game statistics
-        stats.reset_stats()
-        stats.game_active = True
-
-        # Reset the scoreboard images.
-        sb.prep_score()
-        sb.prep_high_score()
-        sb.prep_level_image()
-        sb.prep_stage()
-        sb.prep_ships()
-
-        # Empty the list of aliens and bullets
-        aliens.empty()
-        bullets.empty()
-
-        # Create a new fleet and center the ship.
-        create_fleet(ai_settings, screen, ship, aliens)
-        ship.center_ship()
-
-def update_screen(ai_settings, screen, stats, sb, ship, aliens, bullets, play_button):
-    """ Update images on the screen and flip to the new screen. """
+        start_game(ai_settings, screen, stats, sb, ship, aliens, bullets)
+
+def start_game(ai_settings, screen, stats, sb, ship, aliens, bullets):
+    """ Reset settings, statistics and the fleet for a new game. """
+
+    ai_settings.initialize_dynamic_settings()
+
+    # Reset the game statistics
+    stats.reset_stats()
+    stats.game_active = True
+    stats.scheduler.enter(PLAYING)
+
+    # Reset the scoreboard images.
+    sb.prep_score()
+    sb.prep_high_score()
+    sb.prep_level_image()
+    sb.prep_stage()
+    sb.prep_ships()
+
+    # Empty the list of aliens and bullets
+    aliens.empty()
+    bullets.empty()
+
+    # Create a new fleet and center the ship.
+    create_fleet(ai_settings, screen, ship, aliens)
+    ship.center_ship()
+
+def update_game(ai_settings, screen, stats, sb, ship, aliens, bullets, particles=None):
+    """ Advance the game by one fixed time step. Explosions are added to particles, if given
+    (they move on their own, see particles.Particles.update()). """
+    stats.play_time += ai_settings.time_step
+
+    # A pause or transition uses up the step instead of moving anything
+    if stats.scheduler.advance(ai_settings.time_step):
+        return
+
+    if ship.controls.firing and ai_settings.auto_fire_interval > 0:
+        auto_fire(ai_settings, screen, ship, bullets)
+    ship.update()
+    update_bullets(ai_settings, screen, stats, sb, ship, aliens, bullets, particles)
+
+    # Update after update_bullets bc we want to check if aliens have been hit yet.
+    update_aliens(ai_settings, screen, stats, sb, ship, aliens, bullets, particles)
+
+def update_screen(ai_settings, screen, stats, sb, ship, aliens, bullets, play_button, alpha=1.0,
+                  renderer=None, overlays=(), capture=None, particles=None):
+    """ Update images on the screen and flip to the new screen.
+
+    alpha is how far the clock is between the last simulation step and the next one,
+    moving objects are drawn that fraction of the way along their last step. With a
+    renderer (e.g. renderer.DirtyRenderer) drawing is left to it, otherwise the whole
+    screen is redrawn and presented. overlays are extra (surface, rect) pairs drawn on top
+    of everything, such as the profiler's. With a capture (capture.FrameCapture), the
+    finished frame is handed to it to be saved. particles are drawn over the fleet.
+    """
+
+    # Nothing steps while the game is inactive or paused, so draw everything where it stopped
+    if not stats.game_active or stats.scheduler.paused():
+        alpha = 1.0
+
+    if renderer is not None:
+        renderer.render(stats, sb, ship, aliens, bullets, play_button, alpha, overlays, particles)
+        if capture is not None:
+            capture.capture(screen)
+        return
 
     # Redraw the screen during each pass through the loop
     # If this was below "Redraw all bullets ... ", then it would cover up the bullets since it's
@@ -92,13 +175,20 @@ def update_screen(ai_settings, screen, stats, sb, ship, aliens, bullets, play_bu
 
     # Redraw all bullets behind ship and aliens.
     for bullet in bullets.sprites():
-        bullet.draw_bullet()
+        bullet.draw_bullet(alpha)
 
-    ship.blitme()
+    ship.blitme(alpha)
 
-    # Using draw() on a group will automatically draw each element in that group
-    # at the position defined by rect attribute
-    aliens.draw(screen)
+    # Draw the whole fleet in one blits() call at each alien's interpolated position
+    if isinstance(aliens, (ArrayFleet, SpriteFleet)):
+        aliens.draw(screen, alpha)
+    else:
+        screen.blits([(alien.image, alien.interpolated_topleft(alpha)) for alien in aliens.sprites()],
+                     False)
+
+    # Explosions over the fleet, in one blits() call too
+    if particles is not None:
+        particles.draw(screen, alpha)
 
     # Draw score information
     sb.show_score()
@@ -107,31 +197,44 @@ def update_screen(ai_settings, screen, stats, sb, ship, aliens, bullets, play_bu
     if not stats.game_active:
         play_button.draw_button()
 
+    for image, rect in overlays:
+        screen.blit(image, rect)
+
     # Make the most recently drawn screen visible
-    pygame.display.update()
+    present(screen)
+    if capture is not None:
+        capture.capture(screen)
 
 
-def update_bullets(ai_settings, screen, stats, sb, ship, aliens, bullets):
+def update_bullets(ai_settings, screen, stats, sb, ship, aliens, bullets, particles=None):
     """ Update position of bullets and get rid of old bullets. """
 
     # Update bullet positions
     bullets.update()
 
     # Get rid of bullets that have disappeared
-    # Make a copy because you don't want to remove items from a list within a for loop
-    # So, we have to loop over a copy of the group.
-    for bullet in bullets.copy():
-        if bullet.rect.bottom <= 0:
-            bullets.remove(bullet)
+    # A BulletGroup only looks at the oldest bullets, the ones that can have left the screen
+    if isinstance(bullets, BulletGroup):
+        bullets.remove_offscreen()
+    else:
+        # Make a copy because you don't want to remove items from a list within a for loop
+        # So, we have to loop over a copy of the group.
+        for bullet in bullets.copy():
+            if bullet.rect.bottom <= 0:
+                bullets.remove(bullet)
 
-    check_bullet_alien_collisions(ai_settings, screen, stats, sb, ship, aliens, bullets)
+    check_bullet_alien_collisions(ai_settings, screen, stats, sb, ship, aliens, bullets, particles)
 
-def check_bullet_alien_collisions(ai_settings, screen, stats, sb, ship, aliens, bullets):
+def check_bullet_alien_collisions(ai_settings, screen, stats, sb, ship, aliens, bullets, particles=None):
     """ Respond to bullet - alien collisions """
 
     # Check for unit collision (overlapping)
     # Whenever the two groups overlap, groupcollide() returns a key-pair dictionary and True's delete the bullets/aliens
-    collisions = pygame.sprite.groupcollide(bullets, aliens, False, True)
+    # Fleets that know their formation only test the aliens near each bullet
+    if isinstance(aliens, (ArrayFleet, SpriteFleet)):
+        collisions = aliens.collide_bullets(bullets)
+    else:
+        collisions = pygame.sprite.groupcollide(bullets, aliens, False, True)
 
     # Each bullet that collides w/ an alien becomes a key in collisions, value associated is list of aliens that it collided with
     if collisions:
@@ -142,6 +245,11 @@ def check_bullet_alien_collisions(ai_settings, screen, stats, sb, ship, aliens,
             stats.score += ai_settings.alien_points * len(aliens)
             sb.prep_score()
 
+            # Each alien shot down explodes where it was (the array fleet's hits are rects)
+            if particles is not None:
+                for alien in aliens:
+                    particles.explode(*getattr(alien, 'rect', alien).center)
+
         check_high_score(stats, sb)
 
     # Do here because that's where individual aliens are destroyed
@@ -155,9 +263,11 @@ def check_bullet_alien_collisions(ai_settings, screen, stats, sb, ship, aliens,
         stats.level += 1
         sb.prep_level_image()
 
-        # sb.prep_stage() --> doing this indents the "Stage:" label not too sure why (so just didn't include it
         create_fleet(ai_settings, screen, ship, aliens)
 
+        # Hold the new fleet still for a moment before the level starts
+        stats.scheduler.enter(LEVEL_TRANSITION, ai_settings.level_pause)
+
 
 def get_number_aliens_x(ai_settings, alien_width):
     """ Determine the number of aliens that fit in a row"""
@@ -181,27 +291,52 @@ def create_alien(ai_settings, screen, aliens, alien_number, row_number):
     # Add up the alien width, with the (2 * width) to account for space each alien takes up
     # And multiply it by the alien's position.
     alien.x = alien_width + 2 * alien_width * alien_number
+    alien.previous_x = alien.x
     alien.rect.x = alien.x
 
     # Each row starts 2 alien heights below the last row, so (2 * ... * row_number)
     # If row number is not 1st row, we have one alien's height to create empty space at top of row
     alien.rect.y = alien.rect.height + 2 * alien.rect.height * row_number
+
+    # Remember the alien's slot in the formation for fleets that index aliens by it
+    alien.alien_number = alien_number
+    alien.row_number = row_number
     aliens.add(alien)
 
+def get_formation(ai_settings, ship_height, alien_width, alien_height):
+    """ Return the fleet's layout for this screen and these sprite sizes, worked out the
+    first time it's asked for (every level and every new ship reuses it). """
+    key = (ai_settings.screen_width, ai_settings.screen_height, ship_height, alien_width, alien_height)
+    formation = formations.get(key)
+    if formation is None:
+        number_aliens_x = get_number_aliens_x(ai_settings, alien_width)
+        number_rows = get_number_rows(ai_settings, ship_height, alien_height)
+        formation = Formation(number_aliens_x, number_rows - 1, alien_width, alien_height)
+        formations[key] = formation
+    return formation
+
 def create_fleet(ai_settings, screen, ship, aliens):
     """ Create a fleet full of aliens. """
 
-    # Create an alien and find the number of aliens in a row.
-    alien = Alien(ai_settings, screen)
-    number_aliens_x = get_number_aliens_x(ai_settings, alien.rect.width)
-    number_rows = get_number_rows(ai_settings, ship.rect.height, alien.rect.height)
+    # Find the number of aliens in a row from the size of the alien image
+    # (every alien uses it, so there is no need to create one just to measure it)
+    alien_width, alien_height = assets.load_image('spaceship.png').get_size()
+    formation = get_formation(ai_settings, ship.rect.height, alien_width, alien_height)
+
+    # The array fleet copies the whole formation in one operation, there are no sprites to
+    # create, and the sprite fleet places its (reused) aliens straight from the formation
+    if isinstance(aliens, ArrayFleet):
+        aliens.restore(formation)
+        return
+    elif isinstance(aliens, SpriteFleet):
+        aliens.restore(formation, ai_settings, screen)
+        return
 
     # Create the first row of aliens
     # Outer loop counts number of rows we want
     # Inner loop creates aliens in one row
-    for row_number in range(number_rows -1):
-        for alien_number in range(number_aliens_x):
-            create_alien(ai_settings, screen, aliens, alien_number, row_number)
+    for alien_number, row_number, x, y in formation.slots:
+        create_alien(ai_settings, screen, aliens, alien_number, row_number)
 
 def get_number_rows(ai_settings, ship_height, alien_height):
     """ Determine the number of rows of aliens that fit on the screen. """
@@ -216,23 +351,36 @@ def change_fleet_direction(ai_settings, aliens):
     """ Drop the entire fleet and change fleet's direction """
 
     # Loop through all aliens and multiply by -1 if alien is at the edge.
-    for alien in aliens.sprites():
-        alien.rect.y += float(ai_settings.fleet_drop_speed)
-    ai_settings.fleet_direction *= -1
+    if isinstance(aliens, ArrayFleet):
+        aliens.drop(ai_settings.fleet_drop_speed)
+    else:
+        for alien in aliens.sprites():
+            alien.rect.y += float(ai_settings.fleet_drop_speed)
+    ai_settings.reverse_fleet_direction()
 
 def check_fleet_edges(ai_settings, aliens):
     """ Respond appropriately if any aliens have reached an edge """
 
     # Loops through the fleet and calls check_edges() on each alien
     # If True, then the alien is at the edge and whole fleet needs to change direction
+    # Fleets that know their formation test their bounding box instead, in constant time
+    if isinstance(aliens, (ArrayFleet, SpriteFleet)):
+        if aliens.check_edges(ai_settings.screen_width):
+            change_fleet_direction(ai_settings, aliens)
+        return
+
     for alien in aliens.sprites():
         if alien.check_edges():
             change_fleet_direction(ai_settings, aliens)
             break
 
-def ship_hit(ai_settings, screen, stats, sb, ship, aliens, bullets):
+def ship_hit(ai_settings, screen, stats, sb, ship, aliens, bullets, particles=None):
     """ Respond to ship being hit by alien. """
 
+    # The ship blows up where it was hit, before it's moved back to the center
+    if particles is not None:
+        particles.explode(ship.rect.centerx, ship.rect.centery, 4 * ai_settings.particles_per_explosion)
+
     if stats.ships_left > 0:
         # Decrement ships_left
         stats.ships_left -= 1
@@ -245,38 +393,59 @@ def ship_hit(ai_settings, screen, stats, sb, ship, aliens, bullets):
         create_fleet(ai_settings, screen, ship, aliens)
         ship.center_ship()
 
-        # Pause
-        sleep(0.5)
+        # Pause without blocking: the main loop keeps handling events and drawing while
+        # the scheduler counts the pause down (headless runs set this to 0)
+        stats.scheduler.enter(RESPAWN_PAUSE, ai_settings.respawn_pause)
 
         # Update scoreboard
         sb.prep_ships()
 
     else:
         stats.game_active = False
+        stats.scheduler.enter(GAME_OVER)
+
+        # Queue the game for the leaderboard (it's written to disk in the background)
+        stats.record_game()
         pygame.mouse.set_visible(True)
 
-def check_aliens_bottom(ai_settings, screen, stats, sb, ship, aliens, bullets):
+def check_aliens_bottom(ai_settings, screen, stats, sb, ship, aliens, bullets, particles=None):
     """ Check if any aliens have reached the bottom of the screen. """
     screen_rect = screen.get_rect()
+    if isinstance(aliens, (ArrayFleet, SpriteFleet)):
+        if aliens.reached_bottom(screen_rect.bottom):
+            ship_hit(ai_settings, screen, stats, sb, ship, aliens, bullets, particles)
+        return
+
     for alien in aliens.sprites():
         if alien.rect.bottom >= screen_rect.bottom:
             """ Treat this the same as if the ship got hit. """
-            ship_hit(ai_settings, screen, stats, sb, ship, aliens, bullets)
+            ship_hit(ai_settings, screen, stats, sb, ship, aliens, bullets, particles)
             break
 
-def update_aliens(ai_settings, screen, stats, sb, ship, aliens, bullets):
+def update_aliens(ai_settings, screen, stats, sb, ship, aliens, bullets, particles=None):
     """ Update position of all aliens in the fleet. """
     check_fleet_edges(ai_settings, aliens)
     aliens.update()
 
     # Look for alien - ship collisions
-    if pygame.sprite.spritecollideany(ship, aliens):
-        ship_hit(ai_settings, screen, stats, sb, ship, aliens, bullets)
+    if isinstance(aliens, (ArrayFleet, SpriteFleet)):
+        ship_collided = aliens.collide_rect(ship.rect)
+    else:
+        ship_collided = pygame.sprite.spritecollideany(ship, aliens)
+    if ship_collided:
+        ship_hit(ai_settings, screen, stats, sb, ship, aliens, bullets, particles)
 
-    check_aliens_bottom(ai_settings, screen, stats, sb, ship, aliens, bullets)
+    check_aliens_bottom(ai_settings, screen, stats, sb, ship, aliens, bullets, particles)
 
 def check_high_score(stats, sb):
     """ Check to see if there's a new high score. """
     if stats.score > stats.high_score:
         stats.high_score = stats.score
+        sb.prep_high_score()
+
+def check_saved_high_score(stats, sb):
+    """ Show the saved high score once the store has loaded it in the background. """
+    best = stats.high_scores.loaded_best()
+    if best is not None and best > stats.high_score:
+        stats.high_score = best
         sb.prep_high_score()
\ No newline at end of file
@@ -1,13 +1,21 @@
+from scheduler import Scheduler
+
+
 class GameStats():
 
     """ Track statistics for Alien Invasion. """
 
-    def __init__(self, ai_settings):
-        """ Initialize the statistics """
+    def __init__(self, ai_settings, high_scores=None):
+        """ Initialize the statistics. high_scores is an optional highscores.HighScoreStore
+        that finished games are saved to. """
         self.ai_settings = ai_settings
+        self.high_scores = high_scores
         self.reset_stats()
         self.game_active = False
 
+        # Which state the game is in (playing, paused after a hit, between levels, game over)
+        self.scheduler = Scheduler()
+
         # High score should never be reset (because always comparing it to 0 in game_functions.check_high_score()
         self.high_score = 0
 
@@ -15,4 +23,12 @@ class GameStats():
         """ Initialize statistics that we can change during the game. """
         self.ships_left = self.ai_settings.ship_limit
         self.score = 0
-        self.level = 1
\ No newline at end of file
+        self.level = 1
+
+        # Seconds of game time since the game started
+        self.play_time = 0.0
+
+    def record_game(self):
+        """ Queue the finished game for the high score store, if there is one. """
+        if self.high_scores is not None:
+            self.high_scores.submit(self.score, self.level, self.play_time)
\ No newline at end of file
@@ -0,0 +1,270 @@
+""" Run Alien Invasion without a window, and play many seeded games across all cores.
+
+    python headless.py --games 200 --policy random --set fleet_backend=array
+"""
+import argparse
+import ast
+import multiprocessing
+import os
+import random
+import time
+
+# Must be set before pygame initializes video, so no window is ever opened. SDL's own
+# signal handlers would turn SIGTERM into a QUIT event nobody reads, and the batch
+# runner's pool could never stop its workers.
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('SDL_NO_SIGNAL_HANDLERS', '1')
+
+import pygame
+from settings import Settings
+from ship import Ship
+from game_stats import GameStats
+from fleet import make_fleet
+from bullet import BulletGroup
+import game_functions as gf
+
+
+class NullScoreboard():
+    """ A Scoreboard stand-in that skips all font rendering. """
+
+    def prep_score(self):
+        pass
+
+    def prep_high_score(self):
+        pass
+
+    def prep_level_image(self):
+        pass
+
+    def prep_stage(self):
+        pass
+
+    def prep_ships(self):
+        pass
+
+    def images(self):
+        return []
+
+    def show_score(self):
+        pass
+
+
+class RandomPolicy():
+    """ Hold random movement keys for random stretches and tap fire at random. """
+
+    def __init__(self, seed, hold_frames=60, fire_chance=.1):
+        self.random = random.Random(seed)
+        self.hold_frames = hold_frames
+        self.fire_chance = fire_chance
+        self.move_key = None
+        self.frames_left = 0
+
+    def __call__(self, game):
+        """ Return the set of keys held down this frame. """
+        if self.frames_left <= 0:
+            self.move_key = self.random.choice((pygame.K_LEFT, pygame.K_RIGHT, None))
+            self.frames_left = self.random.randint(1, self.hold_frames)
+        self.frames_left -= 1
+
+        keys = set()
+        if self.move_key is not None:
+            keys.add(self.move_key)
+        if self.random.random() < self.fire_chance:
+            keys.add(pygame.K_SPACE)
+        return keys
+
+
+class ScriptedPolicy():
+    """ Replay a fixed list of (frames, keys) steps, looping when it runs out. """
+
+    def __init__(self, script):
+        self.frames = []
+        for frames, keys in script:
+            self.frames.extend([set(keys)] * frames)
+
+    def __call__(self, game):
+        return self.frames[game.frame % len(self.frames)]
+
+
+def sweep_policy(seed):
+    """ Sweep the ship across the screen and back, tapping fire the whole time. """
+    right = [(5, (pygame.K_RIGHT, pygame.K_SPACE)), (5, (pygame.K_RIGHT,))] * 30
+    left = [(5, (pygame.K_LEFT, pygame.K_SPACE)), (5, (pygame.K_LEFT,))] * 30
+    return ScriptedPolicy(right + left)
+
+
+POLICIES = {
+    'random': RandomPolicy,
+    'sweep': sweep_policy,
+}
+
+
+class HeadlessGame():
+    """ The game objects from run_game, on an offscreen surface and without a scoreboard. """
+
+    def __init__(self, ai_settings=None, screen=None):
+        """ Initialize the game without opening a window, on screen if one is given. """
+        # The dummy video driver lets pygame.mouse and image loading work with no display
+        pygame.display.init()
+
+        self.ai_settings = ai_settings or Settings()
+        self.ai_settings.respawn_pause = 0
+        self.ai_settings.level_pause = 0
+        # Nothing is drawn headless, so the screen only needs a size; 8 bits a pixel keeps
+        # stress-test screens far larger than any display cheap
+        self.screen = screen
+        if self.screen is None:
+            self.screen = pygame.Surface((self.ai_settings.screen_width,
+                                          self.ai_settings.screen_height), depth=8)
+
+        self.stats = GameStats(self.ai_settings)
+        self.sb = NullScoreboard()
+        self.ship = Ship(self.ai_settings, self.screen)
+        self.bullets = BulletGroup()
+        self.aliens = make_fleet(self.ai_settings, self.screen)
+
+        self.frame = 0
+        self.keys = set()
+
+    def reset(self):
+        """ Start a new game, as if Play was clicked. """
+        gf.start_game(self.ai_settings, self.screen, self.stats, self.sb, self.ship,
+                      self.aliens, self.bullets)
+        self.frame = 0
+        self.keys = set()
+
+    def press(self, keys):
+        """ Send key down/up events for the difference between keys and the keys held now. """
+        for key in keys - self.keys:
+            gf.check_keydown_events(pygame.event.Event(pygame.KEYDOWN, key=key), self.ai_settings,
+                                    self.screen, self.ship, self.bullets)
+        for key in self.keys - keys:
+            gf.check_keyup_events(pygame.event.Event(pygame.KEYUP, key=key), self.ai_settings,
+                                  self.ship)
+        self.keys = keys
+
+    def step(self, keys=frozenset()):
+        """ Apply the held keys and advance the game by one fixed time step. """
+        self.press(set(keys))
+        gf.update_game(self.ai_settings, self.screen, self.stats, self.sb, self.ship,
+                       self.aliens, self.bullets)
+        self.frame += 1
+
+    def play(self, policy, max_frames):
+        """ Play until the game is over or max_frames steps have run. """
+        self.reset()
+        while self.stats.game_active and self.frame < max_frames:
+            self.step(policy(self))
+
+
+# Settings computed from others, or reset from them when each game starts, and the setting
+# to override instead of each
+DERIVED_SETTINGS = {
+    'time_step': 'updates_per_second',
+    'alien_step': 'initial_alien_speed_factor',
+    'ship_speed_factor': 'initial_ship_speed_factor',
+    'bullet_speed_factor': 'initial_bullet_speed_factor',
+    'alien_speed_factor': 'initial_alien_speed_factor',
+    'fleet_direction': 'initial_fleet_direction',
+    'alien_points': 'initial_alien_points',
+}
+
+
+def make_settings(overrides):
+    """ Return Settings with attributes replaced by the overrides dictionary, and the
+    settings derived from them worked out again. """
+    ai_settings = Settings()
+    for name, value in overrides.items():
+        if not hasattr(ai_settings, name):
+            raise AttributeError("Settings has no attribute '{}'".format(name))
+        if name in DERIVED_SETTINGS:
+            raise AttributeError("Settings.{} comes from {}; override that instead".format(
+                name, DERIVED_SETTINGS[name]))
+        setattr(ai_settings, name, value)
+    ai_settings.update_derived_settings()
+    ai_settings.initialize_dynamic_settings()
+    return ai_settings
+
+
+def play_game(seed, policy='random', max_frames=100000, overrides=None):
+    """ Play one seeded game and return its results. """
+    game = HeadlessGame(make_settings(overrides or {}))
+    start = time.perf_counter()
+    game.play(POLICIES[policy](seed), max_frames)
+    elapsed = time.perf_counter() - start
+
+    return {
+        'seed': seed,
+        'score': game.stats.score,
+        'level': game.stats.level,
+        'ships_left': game.stats.ships_left,
+        'frames': game.frame,
+        'game_over': not game.stats.game_active,
+        'seconds': elapsed,
+        'fps': game.frame / elapsed if elapsed else 0.0,
+    }
+
+
+def _play_game(args):
+    """ Pool.imap() can only pass one argument. """
+    return play_game(*args)
+
+
+def run_batch(games, first_seed=0, policy='random', max_frames=100000, overrides=None,
+              processes=None):
+    """ Play games seeded first_seed, first_seed + 1, ... across processes and return the results. """
+    jobs = [(seed, policy, max_frames, overrides) for seed in range(first_seed, first_seed + games)]
+    with multiprocessing.Pool(processes) as pool:
+        return list(pool.imap(_play_game, jobs))
+
+
+def summarize(results, seconds):
+    """ Return a one-line summary of a batch. """
+    frames = sum(result['frames'] for result in results)
+    scores = [result['score'] for result in results]
+    levels = [result['level'] for result in results]
+    return ("{} games in {:.1f}s ({:.0f} games/min, {:.0f} frames/s): "
+            "score mean {:.0f} max {}, level mean {:.2f} max {}").format(
+        len(results), seconds, len(results) / seconds * 60, frames / seconds,
+        sum(scores) / len(scores), max(scores), sum(levels) / len(levels), max(levels))
+
+
+def parse_overrides(pairs):
+    """ Turn ['name=value', ...] into a dictionary, evaluating values as Python literals. """
+    overrides = {}
+    for pair in pairs:
+        name, value = pair.split('=', 1)
+        try:
+            overrides[name] = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            overrides[name] = value
+    return overrides
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0, help="seed of the first game")
+    parser.add_argument('--policy', choices=sorted(POLICIES), default='random')
+    parser.add_argument('--max-frames', type=int, default=100000, help="steps before a game is cut off")
+    parser.add_argument('--processes', type=int, default=None, help="defaults to one per core")
+    parser.add_argument('--set', action='append', default=[], metavar='NAME=VALUE',
+                        help="override a Settings attribute, e.g. --set speedup_scale=1.1")
+    parser.add_argument('--verbose', action='store_true', help="print every game's result")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = run_batch(args.games, args.seed, args.policy, args.max_frames,
+                        parse_overrides(args.set), args.processes)
+    seconds = time.perf_counter() - start
+
+    if args.verbose:
+        for result in results:
+            print("seed {seed}: score {score}, level {level}, {frames} frames, "
+                  "{fps:.0f} fps".format(**result))
+    print(summarize(results, seconds))
+
+
+if __name__ == '__main__':
+    main()
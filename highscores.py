@@ -0,0 +1,101 @@
+import atexit
+import queue
+import sqlite3
+import threading
+import time
+
+
+class HighScoreStore():
+    """ A per-profile leaderboard kept in SQLite and written from a background thread.
+
+    The game thread never touches the database: finished games are queued with submit()
+    and written in batches (write-behind), and the saved scores are loaded in the
+    background when the store opens, so neither startup nor the frame loop waits on disk.
+    """
+
+    def __init__(self, path, profile='player', size=10, flush_interval=1.0):
+        """ Open the store at path and start loading profile's leaderboard in the background. """
+        self.path = path
+        self.profile = profile
+        self.size = size
+        self.flush_interval = flush_interval
+
+        # Finished games waiting to be written; None tells the writer to stop
+        self.queue = queue.Queue()
+
+        # The profile's top games as (score, level, seconds, ended) tuples, best first.
+        # The writer replaces the list whenever it changes; it's empty until loaded.
+        self.leaderboard = []
+        self.loaded = threading.Event()
+        self.best_taken = False
+
+        self.thread = threading.Thread(target=self._run, name='high-scores', daemon=True)
+        self.thread.start()
+
+        # sys.exit() (closing the window) still writes out whatever is queued
+        atexit.register(self.close)
+
+    def submit(self, score, level, seconds):
+        """ Queue a finished game to be saved. Never blocks. """
+        self.queue.put((self.profile, score, level, seconds, time.time()))
+
+    def loaded_best(self):
+        """ Return the saved high score the first time it's asked for after loading has
+        finished, and None otherwise (so the game can poll this every frame). """
+        if self.best_taken or not self.loaded.is_set():
+            return None
+        self.best_taken = True
+        return self.leaderboard[0][0] if self.leaderboard else 0
+
+    def top(self):
+        """ Return the profile's leaderboard as saved so far, best first. """
+        return list(self.leaderboard)
+
+    def close(self, timeout=5.0):
+        """ Write any queued games and stop the writer. """
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join(timeout)
+
+    def _run(self):
+        """ The writer thread: load the leaderboard, then save queued games in batches. """
+        connection = sqlite3.connect(self.path)
+        with connection:
+            connection.execute("CREATE TABLE IF NOT EXISTS games (profile TEXT, score INTEGER, "
+                               "level INTEGER, seconds REAL, ended REAL)")
+            connection.execute("CREATE INDEX IF NOT EXISTS games_by_score ON games (profile, score)")
+        self.leaderboard = self._load(connection)
+        self.loaded.set()
+
+        running = True
+        while running:
+            # Wait for a game, then give more games flush_interval to arrive and write them together
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while batch[-1] is not None:
+                try:
+                    batch.append(self.queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            if batch[-1] is None:
+                running = False
+                batch.pop()
+
+            if batch:
+                self._write(connection, batch)
+                self.leaderboard = self._load(connection)
+        connection.close()
+
+    def _write(self, connection, games):
+        """ Insert games and trim every profile they belong to back to its top size. """
+        with connection:
+            connection.executemany("INSERT INTO games VALUES (?, ?, ?, ?, ?)", games)
+            for profile in set(game[0] for game in games):
+                connection.execute("DELETE FROM games WHERE profile = ? AND rowid NOT IN (SELECT rowid "
+                                   "FROM games WHERE profile = ? ORDER BY score DESC, ended LIMIT ?)",
+                                   (profile, profile, self.size))
+
+    def _load(self, connection):
+        return connection.execute("SELECT score, level, seconds, ended FROM games WHERE profile = ? "
+                                  "ORDER BY score DESC, ended LIMIT ?",
+                                  (self.profile, self.size)).fetchall()
@@ -1,28 +1,78 @@
+# Taken first, so the time to the first frame includes importing pygame and the game
+from time import perf_counter
+start_time = perf_counter()
+
+import random
 import pygame
 from settings import Settings
 from ship import Ship
 import game_functions as gf
-from pygame.sprite import Group
-from alien import Alien
 from game_stats import GameStats
 from button import Button
 from scoreboard import Scoreboard
+from fleet import make_fleet
+from bullet import BulletGroup
+from renderer import DirtyRenderer, fit_display_scale
+from texture_renderer import TextureRenderer
+from profiler import FrameProfiler
+from recording import InputRecorder
+from highscores import HighScoreStore
+from controls import filter_events
+from capture import FrameCapture
+from particles import make_particles
+import assets
 
 def run_game():
     # Initializes game and create a screen object
-    pygame.init()
+    # Only the display (which also handles events) and fonts are used; pygame.init() would
+    # also open the audio device and scan for joysticks
+    pygame.display.init()
+    pygame.font.init()
 
     ai_settings = Settings()
 
-    screen = pygame.display.set_mode((ai_settings.screen_width, ai_settings.screen_height))
-
-    pygame.display.set_caption("Alien Invasion")
+    # The texture backend draws with SDL's Renderer into its own window, and the game lays
+    # itself out on an offscreen surface. Without it, draw in software to the display.
+    # The layout never changes; a larger window shows the same game scaled up
+    ai_settings.display_scale = fit_display_scale(ai_settings)
+    # Captured frames are read from the software-drawn screen, so capturing draws in software
+    renderer = None
+    if ai_settings.render_backend == 'texture' and not ai_settings.capture_path:
+        renderer = TextureRenderer.create(ai_settings)
+    if renderer is not None:
+        screen = renderer.screen
+    else:
+        display = pygame.display.set_mode((ai_settings.screen_width * ai_settings.display_scale,
+                                           ai_settings.screen_height * ai_settings.display_scale))
+
+        pygame.display.set_caption("Alien Invasion")
+
+        # When scaled, the game draws on a surface of its own size and present() scales it up
+        if ai_settings.display_scale == 1:
+            screen = display
+        else:
+            screen = pygame.Surface((ai_settings.screen_width, ai_settings.screen_height)).convert()
+
+        # Draw only what changed each frame, unless full redraws were asked for
+        if ai_settings.dirty_rendering:
+            renderer = DirtyRenderer(ai_settings, screen)
+
+    # Queue only the events the game reads
+    filter_events()
+
+    # Load and convert every image once, before any sprite asks for one
+    assets.preload()
 
     # Make the Play Button
     play_button = Button(ai_settings, screen, "Play")
 
-    # Create an instance to store game statistics
-    stats = GameStats(ai_settings)
+    # Create an instance to store game statistics. The saved high scores load in the
+    # background, so the first frame doesn't wait on the disk
+    high_scores = None
+    if ai_settings.high_score_path:
+        high_scores = HighScoreStore(ai_settings.high_score_path, ai_settings.profile,
+                                     ai_settings.leaderboard_size)
+    stats = GameStats(ai_settings, high_scores)
 
     # create an instance to store game statistics and create a scoreboard
     sb = Scoreboard(ai_settings, screen, stats)
@@ -30,29 +80,76 @@ def run_game():
     # Make a ship
     ship = Ship(ai_settings, screen)
 
-    # Make an alien
-    alien = Alien(ai_settings, screen)
-
     # Make a group to store bullets in. Behaves like a list w/ extra functionality
     # Use this group to draw bullets to screen on each pass through mainloop and update bullet position
-    bullets = Group()
-    aliens = Group()
-
-    # Create a fleet of aliens
-    gf.create_fleet(ai_settings, screen, ship, aliens)
+    # Bullets that leave the screen are kept and fired again instead of allocating new ones
+    bullets = BulletGroup()
+    # The fleet is created when Play is clicked (start_game()), not behind the Play screen
+    aliens = make_fleet(ai_settings, screen)
+
+    # Debris from explosions (None when they're turned off)
+    particles = make_particles(ai_settings)
+
+    # Time each phase of the loop while the profiler overlay is shown (F3)
+    profiler = FrameProfiler(ai_settings)
+    profiler.instrument(gf, ('check_events', 'update_bullets', 'check_bullet_alien_collisions',
+                             'update_aliens', 'update_screen'))
+    profiler.instrument(sb, ('refresh', 'prep_ships'))
+
+    # Record the inputs for replay.py when a recording file is set
+    recorder = None
+    if ai_settings.record_path:
+        random.seed(ai_settings.record_seed)
+        recorder = InputRecorder(ai_settings)
+
+    # Save every frame drawn when a capture directory is set (uncapped frames are encoded
+    # at 60 fps)
+    capture = None
+    if ai_settings.capture_path:
+        capture = FrameCapture(ai_settings.capture_path, ai_settings.capture_format,
+                               ai_settings.capture_queue_size, ai_settings.max_fps or 60)
+
+    # The clock caps the frame rate and measures how much real time each frame took
+    clock = pygame.time.Clock()
+    accumulator = 0.0
+    first_frame = True
 
     # Start the main loop for the game
     while True:
-        gf.check_events(ai_settings, screen, stats, sb, play_button, ship, aliens, bullets)
-
-        if stats.game_active:
-            ship.update()
-            bullets.update()
-            gf.update_bullets(ai_settings, screen, stats, sb, ship, aliens, bullets)
-
-            # Update after update_bullets bc we want to check if aliens have been hit yet.
-            gf.update_aliens(ai_settings, screen, stats, sb, ship, aliens, bullets)
-
-        gf.update_screen(ai_settings, screen, stats, sb, ship, aliens, bullets, play_button)
+        # Clamp long frames (e.g. dragging the window) so we don't run a burst of updates
+        frame_time = min(clock.tick(ai_settings.max_fps) / 1000.0, ai_settings.max_frame_time)
+        accumulator += frame_time
+        profiler.begin_frame()
+
+        gf.check_events(ai_settings, screen, stats, sb, play_button, ship, aliens, bullets, recorder,
+                        renderer)
+        if high_scores is not None:
+            gf.check_saved_high_score(stats, sb)
+
+        # Run as many fixed steps as the elapsed time covers, so the game plays at the
+        # same speed no matter how fast the machine renders.
+        while accumulator >= ai_settings.time_step:
+            if stats.game_active:
+                gf.update_game(ai_settings, screen, stats, sb, ship, aliens, bullets, particles)
+            # Explosions play out even while the game is paused or over
+            if particles is not None:
+                particles.update(ai_settings.time_step)
+            accumulator -= ai_settings.time_step
+            if recorder is not None:
+                recorder.advance(stats)
+
+        # Draw the leftover fraction of a step as interpolation between the last two states
+        gf.update_screen(ai_settings, screen, stats, sb, ship, aliens, bullets, play_button,
+                         accumulator / ai_settings.time_step, renderer, profiler.overlays(),
+                         capture, particles)
+
+        profiler.end_frame()
+        if first_frame:
+            first_frame = False
+            if ai_settings.report_startup:
+                print("First frame after {:.0f} ms".format((perf_counter() - start_time) * 1000))
+        if ai_settings.save_profile:
+            profiler.save()
+            ai_settings.save_profile = False
 
 run_game()
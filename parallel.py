@@ -0,0 +1,269 @@
+""" Step many headless games together in worker processes, with their state in shared memory.
+
+    python parallel.py --instances 64 --steps 2000 --frames 4
+"""
+import argparse
+import multiprocessing
+import time
+from multiprocessing.shared_memory import SharedMemory
+
+# headless sets up the dummy video driver before pygame is imported
+import headless
+import pygame
+from fleet import ArrayFleet
+import game_functions as gf
+import assets
+
+# NumPy is needed for the shared-memory views; the rest of the game works without it.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Columns of SharedState.stats
+SCORE, LEVEL, SHIPS_LEFT, GAME_ACTIVE, FRAME = range(5)
+
+# What each SharedState.actions move value holds down
+MOVE_KEYS = {-1: pygame.K_LEFT, 0: None, 1: pygame.K_RIGHT}
+
+
+def fleet_capacity(ai_settings):
+    """ Return how many aliens a full fleet has with these settings (the same formation
+    create_fleet() uses). """
+    alien_width, alien_height = assets.load_image('spaceship.png').get_size()
+    ship_height = assets.load_image('rocket.png').get_height()
+    return len(gf.get_formation(ai_settings, ship_height, alien_width, alien_height))
+
+
+class SharedState():
+    """ Every instance's actions and state, as NumPy views of one shared-memory block.
+
+    The parent writes actions and workers write state; each side reads the other's arrays
+    in place, so nothing is copied or pickled between processes.
+
+        actions      int8    (instances, 2)             move (-1, 0, 1) and fire (0, 1)
+        stats        int64   (instances, 5)             SCORE, LEVEL, SHIPS_LEFT, GAME_ACTIVE, FRAME
+        ship_x       float64 (instances,)               the ship's center
+        alien_count  int64   (instances,)
+        aliens       float64 (instances, aliens, 2)     x, y of the first alien_count entries
+        bullet_count int64   (instances,)
+        bullets      float64 (instances, bullets, 2)    centerx, y of the first bullet_count
+    """
+
+    def __init__(self, buffer, instances, max_aliens, max_bullets):
+        """ Lay the arrays out over buffer (a SharedMemory's buf). """
+        self.instances = instances
+        self.offset = 0
+        self.actions = self._array(buffer, np.int8, (instances, 2))
+        self.stats = self._array(buffer, np.int64, (instances, 5))
+        self.ship_x = self._array(buffer, np.float64, (instances,))
+        self.alien_count = self._array(buffer, np.int64, (instances,))
+        self.aliens = self._array(buffer, np.float64, (instances, max_aliens, 2))
+        self.bullet_count = self._array(buffer, np.int64, (instances,))
+        self.bullets = self._array(buffer, np.float64, (instances, max_bullets, 2))
+
+    @staticmethod
+    def size(instances, max_aliens, max_bullets):
+        """ Return the bytes the arrays need (only actions needs padding to stay aligned). """
+        return (2 * instances + 7) // 8 * 8 + 8 * instances * (8 + 2 * (max_aliens + max_bullets))
+
+    def _array(self, buffer, dtype, shape):
+        """ Return the next array of the layout, 8-byte aligned. """
+        self.offset += -self.offset % 8
+        array = np.ndarray(shape, dtype=dtype, buffer=buffer, offset=self.offset)
+        self.offset += array.nbytes
+        return array
+
+    def export(self, index, game):
+        """ Write one game's state into its row of the arrays. """
+        stats = game.stats
+        self.stats[index] = (stats.score, stats.level, stats.ships_left, stats.game_active,
+                             game.frame)
+        self.ship_x[index] = game.ship.center
+
+        aliens = game.aliens
+        if isinstance(aliens, ArrayFleet):
+            count = aliens.count
+            self.aliens[index, :count, 0] = aliens.x[aliens.alive]
+            self.aliens[index, :count, 1] = aliens.y[aliens.alive]
+        else:
+            count = len(aliens)
+            if count:
+                self.aliens[index, :count] = [(alien.x, alien.rect.y) for alien in aliens.sprites()]
+        self.alien_count[index] = count
+
+        count = len(game.bullets)
+        if count:
+            self.bullets[index, :count] = [(bullet.rect.centerx, bullet.y)
+                                           for bullet in game.bullets.sprites()]
+        self.bullet_count[index] = count
+
+
+def _worker(connection, memory_name, instances, max_aliens, max_bullets, first, count, overrides):
+    """ Host games first .. first + count - 1 and run the parent's commands on them. """
+    # The parent owns the block and unlinks it; workers only attach to it
+    memory = SharedMemory(name=memory_name)
+    state = SharedState(memory.buf, instances, max_aliens, max_bullets)
+    games = [headless.HeadlessGame(headless.make_settings(overrides)) for game_number in range(count)]
+
+    while True:
+        command, argument = connection.recv()
+        if command == 'step':
+            for index, game in enumerate(games, first):
+                if game.stats.game_active:
+                    move, fire = state.actions[index]
+                    keys = set()
+                    if MOVE_KEYS[int(move)] is not None:
+                        keys.add(MOVE_KEYS[int(move)])
+                    if fire:
+                        keys.add(pygame.K_SPACE)
+                    # The same keys are held for argument frames, or until the game ends
+                    for frame in range(argument):
+                        game.step(keys)
+                        if not game.stats.game_active:
+                            break
+                state.export(index, game)
+
+        elif command == 'reset':
+            for index in argument:
+                game = games[index - first]
+                game.reset()
+                state.export(index, game)
+
+        elif command == 'close':
+            break
+        connection.send(None)
+
+    # The views must go before the block they point into can close
+    del state
+    memory.close()
+    connection.send(None)
+
+
+class ParallelGames():
+    """ Many independent headless games, stepped together across worker processes.
+
+    Each worker hosts a share of the games. The parent sets every game's action in
+    self.state.actions (or passes them to step()), and after step() or reset() returns
+    reads every game's state from self.state's arrays without copying anything.
+    A game that ends stays over, with GAME_ACTIVE 0, until it's reset.
+    """
+
+    def __init__(self, instances, processes=None, overrides=None):
+        """ Start the workers and a first game in every instance. """
+        if np is None:
+            raise ImportError("ParallelGames needs NumPy: pip install numpy")
+        overrides = overrides or {}
+        pygame.display.init()
+        ai_settings = headless.make_settings(overrides)
+        max_aliens = fleet_capacity(ai_settings)
+        max_bullets = ai_settings.bullets_allowed
+
+        self.instances = instances
+        self.memory = SharedMemory(create=True,
+                                   size=SharedState.size(instances, max_aliens, max_bullets))
+        self.state = SharedState(self.memory.buf, instances, max_aliens, max_bullets)
+
+        # Split the games as evenly as possible between the workers
+        processes = min(processes or multiprocessing.cpu_count(), instances)
+        self.connections = []
+        self.workers = []
+        self.shares = []
+        first = 0
+        for worker_number in range(processes):
+            count = instances // processes + (worker_number < instances % processes)
+            parent_end, worker_end = multiprocessing.Pipe()
+            worker = multiprocessing.Process(
+                target=_worker, daemon=True,
+                args=(worker_end, self.memory.name, instances, max_aliens, max_bullets, first,
+                      count, overrides))
+            worker.start()
+            self.connections.append(parent_end)
+            self.workers.append(worker)
+            self.shares.append(range(first, first + count))
+            first += count
+
+        self.reset()
+
+    def _command(self, commands):
+        """ Send each worker its command, then wait for all of them to finish. """
+        for connection, command in zip(self.connections, commands):
+            if command is not None:
+                connection.send(command)
+        for connection, command in zip(self.connections, commands):
+            if command is not None:
+                connection.recv()
+
+    def reset(self, indices=None):
+        """ Start a new game in the instances at indices (all of them by default). """
+        if indices is None:
+            indices = range(self.instances)
+        indices = set(int(index) for index in indices)
+        commands = []
+        for share in self.shares:
+            mine = [index for index in share if index in indices]
+            commands.append(('reset', mine) if mine else None)
+        self._command(commands)
+
+    def step(self, move=None, fire=None, frames=1):
+        """ Advance every game that is still playing by frames fixed time steps, holding the
+        given move and fire (one per instance, or one for all) the whole time. """
+        if move is not None:
+            self.state.actions[:, 0] = move
+        if fire is not None:
+            self.state.actions[:, 1] = fire
+        self._command([('step', frames)] * len(self.workers))
+
+    def close(self):
+        """ Stop the workers and free the shared memory. """
+        if self.memory is None:
+            return
+        self._command([('close', None)] * len(self.workers))
+        for worker in self.workers:
+            worker.join()
+        del self.state
+        self.memory.close()
+        self.memory.unlink()
+        self.memory = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--instances', type=int, default=64)
+    parser.add_argument('--processes', type=int, default=None, help="defaults to one per core")
+    parser.add_argument('--steps', type=int, default=1000, help="step() calls to time")
+    parser.add_argument('--frames', type=int, default=1, help="frames each step() runs")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the random actions")
+    parser.add_argument('--set', action='append', default=[], metavar='NAME=VALUE',
+                        help="override a Settings attribute, e.g. --set fleet_backend=array")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    with ParallelGames(args.instances, args.processes, headless.parse_overrides(args.set)) as games:
+        stats = games.state.stats
+        frames = 0
+        start = time.perf_counter()
+        for step_number in range(args.steps):
+            games.step(rng.integers(-1, 2, args.instances), rng.random(args.instances) < .1,
+                       args.frames)
+            # Games that ended start again, as a training loop would
+            over = np.flatnonzero(stats[:, GAME_ACTIVE] == 0)
+            if len(over):
+                frames += int(stats[over, FRAME].sum())
+                games.reset(over)
+        seconds = time.perf_counter() - start
+        frames += int(stats[:, FRAME].sum())
+        del stats
+
+    print("{} instances on {} processes: {:.0f} steps/s, {:.0f} frames/s".format(
+        args.instances, len(games.workers), args.steps / seconds, frames / seconds))
+
+
+if __name__ == '__main__':
+    main()
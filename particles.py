@@ -0,0 +1,137 @@
+import math
+
+import pygame
+
+# NumPy is only needed for explosions; without it the game simply has none.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Particles fade toward the background in this many steps over their life
+FADE_LEVELS = 4
+
+
+def make_particles(ai_settings):
+    """ Return the explosion particles for the game, or None if they're turned off (a
+    particle_budget of 0) or NumPy isn't installed. """
+    if np is None or not ai_settings.particle_budget:
+        return None
+    return Particles(ai_settings)
+
+
+class Particles():
+    """ Debris flying out of explosions, stored in NumPy arrays allocated once.
+
+    The live particles are always the first count entries of every array, so a step moves
+    and ages all of them in a few array operations, and dead ones are dropped by packing the
+    rest to the front. There is never room for more than particle_budget particles:
+    explosions that don't fit get fewer (or no) particles, and those are counted in dropped.
+    Particles are only for show; nothing in the game depends on them.
+    """
+
+    def __init__(self, ai_settings, seed=0):
+        """ Allocate room for particle_budget particles and make their images. """
+        self.ai_settings = ai_settings
+        self.budget = ai_settings.particle_budget
+        self.size = ai_settings.particle_size
+        self.random = np.random.default_rng(seed)
+
+        # Centers now and one step ago, velocity, and seconds left of life (out of lifetime)
+        self.x = np.zeros(self.budget)
+        self.y = np.zeros(self.budget)
+        self.previous_x = np.zeros(self.budget)
+        self.previous_y = np.zeros(self.budget)
+        self.vx = np.zeros(self.budget)
+        self.vy = np.zeros(self.budget)
+        self.life = np.zeros(self.budget)
+        self.lifetime = np.ones(self.budget)
+        self.arrays = (self.x, self.y, self.previous_x, self.previous_y, self.vx, self.vy,
+                       self.life, self.lifetime)
+        self.count = 0
+        self.dropped = 0
+
+        # One small square per fade level, from particle_color to almost the background
+        color = pygame.Color(ai_settings.particle_color)
+        background = pygame.Color(ai_settings.bg_color)
+        self.images = np.empty(FADE_LEVELS, dtype=object)
+        for level in range(FADE_LEVELS):
+            image = pygame.Surface((self.size, self.size))
+            image.fill(color.lerp(background, level / FADE_LEVELS))
+            if pygame.display.get_surface() is not None:
+                image = image.convert()
+            self.images[level] = image
+
+    def __len__(self):
+        """ Return how many particles are alive. """
+        return self.count
+
+    def explode(self, x, y, count=None):
+        """ Send count particles (particles_per_explosion by default) flying out of (x, y). """
+        if count is None:
+            count = self.ai_settings.particles_per_explosion
+        room = min(count, self.budget - self.count)
+        self.dropped += count - room
+        if room <= 0:
+            return
+
+        new = slice(self.count, self.count + room)
+        angle = self.random.uniform(0, 2 * math.pi, room)
+        speed = self.random.uniform(.3, 1, room) * self.ai_settings.particle_speed
+        self.x[new] = x
+        self.y[new] = y
+        self.previous_x[new] = x
+        self.previous_y[new] = y
+        self.vx[new] = np.cos(angle) * speed
+        self.vy[new] = np.sin(angle) * speed
+        self.lifetime[new] = self.random.uniform(.5, 1, room) * self.ai_settings.particle_life
+        self.life[new] = self.lifetime[new]
+        self.count += room
+
+    def update(self, time_step):
+        """ Move and age every particle by one time step, and drop the ones that died. """
+        count = self.count
+        if not count:
+            return
+        x, y = self.x[:count], self.y[:count]
+        self.previous_x[:count] = x
+        self.previous_y[:count] = y
+        x += self.vx[:count] * time_step
+        y += self.vy[:count] * time_step
+        self.life[:count] -= time_step
+
+        alive = self.life[:count] > 0
+        if not alive.all():
+            # Pack the survivors to the front of every array
+            survivors = int(alive.sum())
+            for array in self.arrays:
+                array[:survivors] = array[:count][alive]
+            self.count = survivors
+
+    def clear(self):
+        """ Remove every particle. """
+        self.count = 0
+
+    def layout(self, alpha=1.0):
+        """ Return the (image, topleft) pairs for every particle, alpha of the way from its
+        last step, and the rect they all fit in (None when there are none). """
+        count = self.count
+        if not count:
+            return [], None
+        half = self.size / 2
+        x = self.previous_x[:count] + (self.x[:count] - self.previous_x[:count]) * alpha - half
+        y = self.previous_y[:count] + (self.y[:count] - self.previous_y[:count]) * alpha - half
+        x = x.astype(np.int64)
+        y = y.astype(np.int64)
+
+        # Older particles use a fainter image
+        level = (FADE_LEVELS * (1 - self.life[:count] / self.lifetime[:count])).astype(np.intp)
+        images = self.images[np.minimum(level, FADE_LEVELS - 1)]
+
+        left, top = int(x.min()), int(y.min())
+        area = pygame.Rect(left, top, int(x.max()) - left + self.size, int(y.max()) - top + self.size)
+        return list(zip(images.tolist(), zip(x.tolist(), y.tolist()))), area
+
+    def draw(self, surface, alpha=1.0):
+        """ Draw every particle with one blits() call. """
+        surface.blits(self.layout(alpha)[0], False)
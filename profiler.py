@@ -0,0 +1,156 @@
+import csv
+import json
+from collections import deque
+from functools import wraps
+from time import perf_counter
+
+import pygame
+import assets
+
+
+class FrameProfiler():
+    """ Time each phase of the main loop and show the results in an on-screen overlay.
+
+    Phases are timed by wrapping functions with instrument(). While the profiler is
+    disabled a wrapper only checks one flag before calling straight through.
+    """
+
+    # Frame-time histogram buckets, in ms: under 4, 4-8, 8-17 (60 fps), 17-33 (30 fps), slower
+    BUCKETS = (4.0, 8.0, 16.7, 33.3)
+
+    def __init__(self, ai_settings, history=240, trace_limit=100000):
+        """ Initialize the profiler with room for history frames of timings. """
+        self.ai_settings = ai_settings
+        self.enabled = False
+        self.history = history
+
+        # Rolling per-frame timings: frame times, and each phase's total ms per frame
+        self.frame_times = deque(maxlen=history)
+        self.phase_times = {}
+        self.current = {}
+
+        # Every timed call as (name, start, duration, depth) in seconds, for Chrome traces
+        self.trace = deque(maxlen=trace_limit)
+        self.depth = 0
+        self.frame_start = None
+        self.frame_number = 0
+        self.rows = deque(maxlen=trace_limit)
+
+        self.font = None
+
+    def instrument(self, owner, names):
+        """ Replace each named function on owner (a module or object) with a timed wrapper. """
+        for name in names:
+            setattr(owner, name, self._timed(name, getattr(owner, name)))
+
+    def _timed(self, name, function):
+        """ Return function wrapped so each call is timed as phase name. """
+        @wraps(function)
+        def timed(*args, **kwargs):
+            if not self.enabled:
+                return function(*args, **kwargs)
+
+            self.depth += 1
+            start = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                duration = perf_counter() - start
+                self.depth -= 1
+                self.current[name] = self.current.get(name, 0.0) + duration * 1000.0
+                self.trace.append((name, start, duration, self.depth))
+        return timed
+
+    def begin_frame(self):
+        """ Mark the start of a frame, turning profiling on or off to match the settings. """
+        self.enabled = self.ai_settings.show_profiler
+        if self.enabled:
+            self.frame_start = perf_counter()
+        else:
+            self.frame_start = None
+            self.current = {}
+
+    def end_frame(self):
+        """ Mark the end of a frame and file its timings. """
+        if self.frame_start is None:
+            return
+        frame_ms = (perf_counter() - self.frame_start) * 1000.0
+        self.frame_times.append(frame_ms)
+        self.trace.append(('frame', self.frame_start, frame_ms / 1000.0, 0))
+
+        for name in set(self.phase_times) | set(self.current):
+            times = self.phase_times.setdefault(name, deque(maxlen=self.history))
+            times.append(self.current.get(name, 0.0))
+        self.rows.append((self.frame_number, frame_ms, dict(self.current)))
+        self.frame_number += 1
+        self.current = {}
+
+    def histogram(self):
+        """ Return how many recent frames fell in each bucket of BUCKETS. """
+        counts = [0] * (len(self.BUCKETS) + 1)
+        for frame_ms in self.frame_times:
+            bucket = 0
+            while bucket < len(self.BUCKETS) and frame_ms >= self.BUCKETS[bucket]:
+                bucket += 1
+            counts[bucket] += 1
+        return counts
+
+    def overlays(self):
+        """ Return [(surface, rect)] for the overlay, or [] while it is hidden. """
+        if not self.ai_settings.show_profiler or not self.frame_times:
+            return []
+        if self.font is None:
+            self.font = assets.load_font(18)
+
+        average = sum(self.frame_times) / len(self.frame_times)
+        lines = ["{:.0f} fps  {:.2f} ms/frame  max {:.2f}".format(
+            1000.0 / average if average else 0.0, average, max(self.frame_times))]
+        for name in sorted(self.phase_times):
+            times = self.phase_times[name]
+            lines.append("{:<30} {:6.2f} ms  max {:6.2f}".format(name, sum(times) / len(times), max(times)))
+        lines.append("frames <4/8/17/33/slower ms: " + " ".join(map(str, self.histogram())))
+
+        # Text on a dark panel, with the frame-time graph at the bottom (one bar per frame,
+        # the line is the 60 fps budget)
+        line_height = self.font.get_linesize()
+        graph_height = 40
+        width = 320
+        panel = pygame.Surface((width, line_height * len(lines) + graph_height + 8))
+        panel.fill((20, 20, 20))
+        for number, line in enumerate(lines):
+            panel.blit(self.font.render(line, True, (230, 230, 230)), (4, 4 + number * line_height))
+
+        bottom = panel.get_height() - 2
+        scale = graph_height / 33.3
+        for x, frame_ms in enumerate(list(self.frame_times)[-(width - 8):]):
+            bar = min(graph_height, int(frame_ms * scale))
+            color = (80, 200, 80) if frame_ms < 16.7 else (220, 80, 60)
+            panel.fill(color, (4 + x, bottom - bar, 1, bar))
+        panel.fill((200, 200, 60), (4, bottom - int(16.7 * scale), width - 8, 1))
+
+        rect = panel.get_rect()
+        rect.bottomleft = (0, self.ai_settings.screen_height)
+        return [(panel, rect)]
+
+    def save_csv(self, path):
+        """ Write one row per recorded frame: frame, total ms, then ms for each phase. """
+        names = sorted(set(name for row in self.rows for name in row[2]))
+        with open(path, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(['frame', 'frame_ms'] + names)
+            for frame_number, frame_ms, phases in self.rows:
+                writer.writerow([frame_number, '{:.4f}'.format(frame_ms)]
+                                + ['{:.4f}'.format(phases.get(name, 0.0)) for name in names])
+
+    def save_chrome_trace(self, path):
+        """ Write the recorded calls as a Chrome trace (open it in chrome://tracing or Perfetto). """
+        events = [{'name': name, 'ph': 'X', 'ts': start * 1e6, 'dur': duration * 1e6,
+                   'pid': 0, 'tid': 0, 'args': {'depth': depth}}
+                  for name, start, duration, depth in self.trace]
+        with open(path, 'w') as file:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, file)
+
+    def save(self):
+        """ Write the CSV and Chrome trace next to each other, named by Settings.profile_path. """
+        self.save_csv(self.ai_settings.profile_path + '.csv')
+        self.save_chrome_trace(self.ai_settings.profile_path + '.trace.json')
@@ -0,0 +1,94 @@
+import struct
+
+import pygame
+
+# run_game() writes this log when Settings.record_path is set, and replay.py plays it back.
+# File header: magic, format version, seed, screen size, simulation rate and the respawn
+# and level pauses (they are counted in steps, so a replay has to pause the same way)
+MAGIC = b'AIRP'
+VERSION = 2
+HEADER = struct.Struct('<4sHIHHHdd')
+
+# Each record starts with its kind and the number of fixed steps run before it
+KEYDOWN = 1
+KEYUP = 2
+CLICK = 3
+CHECKPOINT = 4
+END = 5
+RECORDS = {
+    KEYDOWN: struct.Struct('<BIi'),
+    KEYUP: struct.Struct('<BIi'),
+    CLICK: struct.Struct('<BIhh'),
+    CHECKPOINT: struct.Struct('<BIqhbB'),
+    END: struct.Struct('<BI'),
+}
+
+# What a checkpoint stores about the game, in record order
+CHECKED = ('score', 'level', 'ships_left', 'game_active')
+
+
+class InputRecorder():
+    """ Record every input check_events() acts on, tagged with the fixed step it happened
+    before, plus checkpoints of the game's state to verify a replay against. """
+
+    def __init__(self, ai_settings):
+        """ Initialize an empty recording for a game played with ai_settings. """
+        self.ai_settings = ai_settings
+        self.seed = ai_settings.record_seed
+
+        # Fixed steps run so far, and the records in the order they happened
+        self.step = 0
+        self.records = []
+
+    def record_key(self, event):
+        """ Record a KEYDOWN or KEYUP event. """
+        kind = KEYDOWN if event.type == pygame.KEYDOWN else KEYUP
+        self.records.append((kind, self.step, event.key))
+
+    def record_click(self, mouse_x, mouse_y):
+        """ Record a mouse click at the position check_play_button() was given. """
+        self.records.append((CLICK, self.step, mouse_x, mouse_y))
+
+    def advance(self, stats):
+        """ Count one fixed step, and take a checkpoint every checkpoint_interval steps. """
+        self.step += 1
+        if self.step % self.ai_settings.checkpoint_interval == 0:
+            self.checkpoint(stats)
+
+    def checkpoint(self, stats):
+        self.records.append((CHECKPOINT, self.step, stats.score, stats.level, stats.ships_left,
+                             stats.game_active))
+
+    def save(self, stats):
+        """ Write the recording, ending with a checkpoint of the game as it is now. """
+        self.checkpoint(stats)
+        with open(self.ai_settings.record_path, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, VERSION, self.seed, self.ai_settings.screen_width,
+                                   self.ai_settings.screen_height,
+                                   self.ai_settings.updates_per_second,
+                                   self.ai_settings.respawn_pause, self.ai_settings.level_pause))
+            for record in self.records:
+                file.write(RECORDS[record[0]].pack(*record))
+            file.write(RECORDS[END].pack(END, self.step))
+
+
+def load(path):
+    """ Read a recording and return (header dictionary, records). """
+    with open(path, 'rb') as file:
+        data = file.read()
+
+    magic, version, seed, width, height, updates_per_second, respawn_pause, level_pause = \
+        HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("{} is not a version {} Alien Invasion recording".format(path, VERSION))
+    header = {'seed': seed, 'screen_width': width, 'screen_height': height,
+              'updates_per_second': updates_per_second, 'respawn_pause': respawn_pause,
+              'level_pause': level_pause}
+
+    records = []
+    offset = HEADER.size
+    while offset < len(data):
+        record = RECORDS[data[offset]].unpack_from(data, offset)
+        records.append(record)
+        offset += RECORDS[record[0]].size
+    return header, records
@@ -0,0 +1,185 @@
+import pygame
+from fleet import ArrayFleet, SpriteFleet
+
+
+def fit_display_scale(ai_settings):
+    """ Return the whole number the game is shown scaled up by. A display_scale of 0 means
+    the largest that fits the desktop. """
+    if ai_settings.display_scale:
+        return ai_settings.display_scale
+    info = pygame.display.Info()
+    return max(1, min(info.current_w // ai_settings.screen_width,
+                      info.current_h // ai_settings.screen_height))
+
+
+def present(screen, dirty=None):
+    """ Show what was drawn on screen, all of it or only the dirty rects.
+
+    screen is either the display surface itself, or the game-sized surface the game draws
+    on when it's shown scaled up. Then only the rects being presented are scaled (by a
+    whole number, so pixels stay sharp) into the display; no sprite is ever scaled. With no
+    display (drawing offscreen), there is nothing to present.
+    """
+    display = pygame.display.get_surface()
+    if display is None:
+        return
+    if screen is display:
+        if dirty is None:
+            pygame.display.update()
+        else:
+            pygame.display.update(dirty)
+        return
+
+    scale = display.get_width() // screen.get_width()
+    if dirty is None:
+        pygame.transform.scale(screen, display.get_size(), display)
+        pygame.display.update()
+        return
+
+    screen_rect = screen.get_rect()
+    scaled = []
+    for rect in dirty:
+        rect = rect.clip(screen_rect)
+        if rect.width and rect.height:
+            target = pygame.Rect(rect.x * scale, rect.y * scale, rect.width * scale, rect.height * scale)
+            pygame.transform.scale(screen.subsurface(rect), target.size, display.subsurface(target))
+            scaled.append(target)
+    pygame.display.update(scaled)
+
+
+class SpriteLayer():
+    """ Where every moving sprite will be drawn this frame, worked out before drawing. """
+
+    def __init__(self, ship, aliens, bullets, alpha, particles=None):
+        """ Lay out the bullets, ship, fleet and particles at their interpolated positions. """
+        self.bullets = [(bullet.color, bullet.interpolated_rect(alpha)) for bullet in bullets.sprites()]
+        self.ship_image = ship.image
+        self.ship_rect = ship.interpolated_rect(alpha)
+        if isinstance(aliens, (ArrayFleet, SpriteFleet)):
+            self.fleet = aliens.blit_sequence(alpha)
+        else:
+            self.fleet = [(alien.image, alien.interpolated_topleft(alpha)) for alien in aliens.sprites()]
+
+        # The fleet moves as one block, so its area is tracked as a single rect (a baked
+        # fleet is a single image already)
+        self.rects = [rect for color, rect in self.bullets]
+        self.rects.append(self.ship_rect)
+        if self.fleet:
+            xs = [topleft[0] for image, topleft in self.fleet]
+            ys = [topleft[1] for image, topleft in self.fleet]
+            width, height = self.fleet[0][0].get_size()
+            self.rects.append(pygame.Rect(min(xs), min(ys), max(xs) - min(xs) + width,
+                                          max(ys) - min(ys) + height))
+
+        # The particles are tracked as one rect too
+        self.particles = []
+        if particles is not None:
+            self.particles, area = particles.layout(alpha)
+            if area is not None:
+                self.rects.append(area)
+
+    def draw(self, screen):
+        """ Draw bullets behind the ship and aliens, and particles over them. """
+        for color, rect in self.bullets:
+            pygame.draw.rect(screen, color, rect)
+        screen.blit(self.ship_image, self.ship_rect)
+        screen.blits(self.fleet, False)
+        screen.blits(self.particles, False)
+
+
+class DirtyRenderer():
+    """ Redraw and present only the parts of the screen that changed since the last frame. """
+
+    def __init__(self, ai_settings, screen):
+        """ Initialize the renderer for a solid-colored screen. """
+        self.ai_settings = ai_settings
+        self.screen = screen
+
+        # Rects the moving sprites covered last frame; they are erased before redrawing
+        self.sprite_rects = []
+
+        # The HUD images (and Play button) on screen, as (image, rect tuple) pairs
+        self.overlays = []
+
+        # Sprites only move while the game is active; one more frame is drawn after it
+        # stops so they settle at their final positions. While it's stopped, sprites can
+        # still be added or removed (e.g. a shot fired on the Play screen).
+        self.sprites_moving = True
+        self.sprite_counts = None
+
+        # Particles keep moving whatever the game is doing; one more frame is drawn after
+        # the last one dies, to erase it
+        self.particles_shown = False
+
+        self.full_redraw = True
+
+    def invalidate(self):
+        """ Redraw and present the whole screen on the next frame. """
+        self.full_redraw = True
+
+    def render(self, stats, sb, ship, aliens, bullets, play_button, alpha=1.0, extra_overlays=(),
+               particles=None):
+        """ Draw the frame and push only the changed regions to the display. """
+        screen = self.screen
+
+        # The scoreboard and Play button are drawn over the sprites. A blit covers the whole
+        # image from the rect's topleft, whatever the rect's size.
+        overlays = [(image, rect.topleft + image.get_size()) for image, rect in sb.images()]
+        if not stats.game_active:
+            overlays.append((play_button.image, tuple(play_button.rect)))
+        overlays.extend((image, tuple(rect)) for image, rect in extra_overlays)
+
+        if self.full_redraw:
+            dirty = [screen.get_rect()]
+            redraw = overlays
+            sprites = SpriteLayer(ship, aliens, bullets, alpha, particles)
+            self.full_redraw = False
+        else:
+            # Overlays that changed or went away leave a hole to clear
+            dirty = [pygame.Rect(rect) for image, rect in self.overlays if (image, rect) not in overlays]
+            redraw = [item for item in overlays if item not in self.overlays]
+
+            # Sprites are erased from where they were and drawn where they are now,
+            # unless none of them moved and nothing underneath them changed.
+            sprites = None
+            sprite_counts = (len(bullets), len(aliens))
+            particles_shown = particles is not None and len(particles) > 0
+            if (stats.game_active or self.sprites_moving or dirty or redraw
+                    or sprite_counts != self.sprite_counts or particles_shown or self.particles_shown):
+                sprites = SpriteLayer(ship, aliens, bullets, alpha, particles)
+                dirty.extend(self.sprite_rects)
+                dirty.extend(sprites.rects)
+
+            # Overlays touching a dirty area are cleared and drawn again on top. Clearing
+            # one can touch another, so repeat until nothing new is pulled in.
+            dirty.extend(pygame.Rect(rect) for image, rect in redraw)
+            touched = True
+            while touched:
+                touched = False
+                for item in overlays:
+                    if item not in redraw and pygame.Rect(item[1]).collidelist(dirty) != -1:
+                        redraw.append(item)
+                        dirty.append(pygame.Rect(item[1]))
+                        touched = True
+
+            # Nothing changed (e.g. waiting on the Play screen), so there is nothing to present
+            if not dirty:
+                return
+
+        # Everything is drawn in the same order as a full redraw, clipped to the dirty areas.
+        # fill() shifts rects that hang off the screen instead of clipping them, so clip first.
+        screen_rect = screen.get_rect()
+        for rect in dirty:
+            screen.fill(self.ai_settings.bg_color, rect.clip(screen_rect))
+        if sprites is not None:
+            sprites.draw(screen)
+            self.sprite_rects = sprites.rects
+        for image, rect in overlays:
+            if (image, rect) in redraw:
+                screen.blit(image, rect)
+
+        present(screen, dirty)
+        self.overlays = overlays
+        self.sprites_moving = stats.game_active
+        self.sprite_counts = (len(bullets), len(aliens))
+        self.particles_shown = particles is not None and len(particles) > 0
@@ -0,0 +1,150 @@
+""" Replay a recorded game headless, as fast as possible, and check it against its checkpoints.
+
+    python replay.py session.airp
+    python replay.py session.airp --capture footage
+"""
+import argparse
+import random
+import sys
+import time
+
+# headless sets up the dummy video driver before pygame is imported
+import headless
+import pygame
+from settings import Settings
+from button import Button
+from scoreboard import Scoreboard
+from capture import FrameCapture, PNG, RAW
+import game_functions as gf
+from recording import load, KEYDOWN, KEYUP, CLICK, CHECKPOINT, CHECKED
+
+
+class ReplayGame(headless.HeadlessGame):
+    """ A HeadlessGame with a Play button to click, so recorded clicks go through
+    check_play_button() the way they did in the game. With render, it also draws frames
+    like the game, on the dummy driver's display, with a real scoreboard. """
+
+    def __init__(self, ai_settings=None, render=False):
+        pygame.font.init()
+        ai_settings = ai_settings or Settings()
+        screen = None
+        if render:
+            pygame.display.init()
+            screen = pygame.display.set_mode((ai_settings.screen_width, ai_settings.screen_height))
+        super(ReplayGame, self).__init__(ai_settings, screen)
+        self.play_button = Button(self.ai_settings, self.screen, "Play")
+        if render:
+            self.sb = Scoreboard(self.ai_settings, self.screen, self.stats)
+
+    def render(self, capture):
+        """ Draw the game as update_screen() does in the game, and capture the frame. """
+        gf.update_screen(self.ai_settings, self.screen, self.stats, self.sb, self.ship, self.aliens,
+                         self.bullets, self.play_button, capture=capture)
+
+    def apply(self, record):
+        """ Feed one recorded input through the same functions check_events() uses. """
+        kind = record[0]
+        if kind == KEYDOWN:
+            gf.check_keydown_events(pygame.event.Event(pygame.KEYDOWN, key=record[2]),
+                                    self.ai_settings, self.screen, self.ship, self.bullets)
+        elif kind == KEYUP:
+            gf.check_keyup_events(pygame.event.Event(pygame.KEYUP, key=record[2]), self.ai_settings,
+                                  self.ship)
+        elif kind == CLICK:
+            gf.check_play_button(self.ai_settings, self.screen, self.stats, self.sb,
+                                 self.play_button, self.ship, self.aliens, self.bullets,
+                                 record[2], record[3])
+
+    def state(self):
+        return tuple(getattr(self.stats, name) for name in CHECKED)
+
+
+def replay(path, overrides=None, capture_path=None, capture_format=PNG, capture_every=2):
+    """ Replay a recording and return its results. 'mismatch' is None if every checkpoint
+    matched, else (step, field, recorded value, replayed value) for the first one that didn't.
+
+    With a capture_path, a frame is drawn every capture_every steps and saved there. The
+    replay waits for the writer instead of dropping frames, since it isn't real time.
+    """
+    header, records = load(path)
+    random.seed(header['seed'])
+
+    ai_settings = headless.make_settings(overrides or {})
+    ai_settings.screen_width = header['screen_width']
+    ai_settings.screen_height = header['screen_height']
+    ai_settings.updates_per_second = header['updates_per_second']
+    ai_settings.update_derived_settings()
+    game = ReplayGame(ai_settings, render=capture_path is not None)
+    capture = None
+    if capture_path is not None:
+        capture = FrameCapture(capture_path, capture_format,
+                               fps=ai_settings.updates_per_second / capture_every, block=True)
+
+    # Pauses are counted in steps, which run as fast as everything else here
+    ai_settings.respawn_pause = header['respawn_pause']
+    ai_settings.level_pause = header['level_pause']
+
+    # Run the steps in the order run_game() did: a frame's inputs are handled before the
+    # steps that follow them, and steps only update the game while it is active
+    start = time.perf_counter()
+    mismatch = None
+    checkpoints = 0
+    for record in records:
+        while game.frame < record[1]:
+            if game.stats.game_active:
+                gf.update_game(game.ai_settings, game.screen, game.stats, game.sb, game.ship,
+                               game.aliens, game.bullets)
+            game.frame += 1
+            if capture is not None and game.frame % capture_every == 0:
+                game.render(capture)
+
+        if record[0] == CHECKPOINT:
+            checkpoints += 1
+            expected = record[2:4] + (record[4], bool(record[5]))
+            for name, recorded, replayed in zip(CHECKED, expected, game.state()):
+                if recorded != replayed:
+                    mismatch = (record[1], name, recorded, replayed)
+                    break
+            if mismatch:
+                break
+        else:
+            game.apply(record)
+    if capture is not None:
+        capture.close()
+    elapsed = time.perf_counter() - start
+
+    return {
+        'steps': game.frame,
+        'checkpoints': checkpoints,
+        'mismatch': mismatch,
+        'seconds': elapsed,
+        'speedup': game.frame * ai_settings.time_step / elapsed if elapsed else 0.0,
+        'captured': capture.written if capture is not None else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('recording')
+    parser.add_argument('--set', action='append', default=[], metavar='NAME=VALUE',
+                        help="override a Settings attribute, e.g. --set fleet_backend=array")
+    parser.add_argument('--capture', metavar='DIRECTORY', help="save the replay's frames here")
+    parser.add_argument('--capture-format', choices=[PNG, RAW], default=PNG)
+    parser.add_argument('--capture-every', type=int, default=2, metavar='STEPS',
+                        help="steps between captured frames (default 2, 60 fps)")
+    args = parser.parse_args()
+
+    result = replay(args.recording, headless.parse_overrides(args.set), args.capture,
+                    args.capture_format, args.capture_every)
+    print("{steps} steps, {checkpoints} checkpoints in {seconds:.2f}s "
+          "({speedup:.0f}x real time)".format(**result))
+    if args.capture:
+        print("{} frames saved to {}".format(result['captured'], args.capture))
+    if result['mismatch']:
+        print("step {}: {} was {} when recorded, {} in the replay".format(*result['mismatch']))
+        sys.exit(1)
+    print("all checkpoints match")
+
+
+if __name__ == '__main__':
+    main()
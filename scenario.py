@@ -0,0 +1,204 @@
+""" Run a stress-test scenario headless and record how the game holds up over time.
+
+    python scenario.py scenarios/bullet_storm.toml --output bullet_storm.csv
+
+A scenario file (TOML or JSON) has a [settings] table of Settings attributes to override,
+and top-level keys for how the run is driven; see Scenario for them.
+"""
+import argparse
+import csv
+import gc
+import json
+import os
+import random
+import time
+import tracemalloc
+
+# tomllib is only in Python 3.11+; JSON scenarios work without it
+try:
+    import tomllib
+except ImportError:
+    tomllib = None
+
+# headless sets up the dummy video driver before pygame is imported
+import headless
+from alien import Alien
+from bullet import Bullet
+import game_functions as gf
+
+# The columns written for each sample, in order
+FIELDS = ['step', 'game_seconds', 'games', 'score', 'level', 'aliens', 'bullets', 'free_bullets',
+          'alien_objects', 'bullet_objects', 'objects', 'step_ms_mean', 'step_ms_max',
+          'memory_kb', 'memory_peak_kb']
+
+
+class Scenario():
+    """ A stress case: the Settings to change and how to drive the game.
+
+    duration is in seconds of game time. fire_rate fires that many bullets per second on top
+    of the policy's (as many as bullets_allowed lets through), so bullet storms don't depend
+    on key presses. With restart, a finished game is followed by a new one until the
+    duration is up, for soak runs. Every sample_interval seconds of game time a sample of
+    step times, memory (with trace_memory) and object counts (with count_objects) is taken.
+    """
+
+    def __init__(self, name, settings=None, policy='random', seed=0, duration=60.0, fire_rate=0.0,
+                 restart=True, sample_interval=1.0, trace_memory=True, count_objects=True):
+        """ Initialize the scenario. """
+        if policy not in headless.POLICIES:
+            raise ValueError("unknown policy '{}'".format(policy))
+        self.name = name
+        self.settings = dict(settings or {})
+        self.policy = policy
+        self.seed = seed
+        self.duration = duration
+        self.fire_rate = fire_rate
+        self.restart = restart
+        self.sample_interval = sample_interval
+        self.trace_memory = trace_memory
+        self.count_objects = count_objects
+
+    @classmethod
+    def load(cls, path):
+        """ Read a scenario from a .toml or .json file, named after the file. """
+        if path.endswith('.toml'):
+            if tomllib is None:
+                raise RuntimeError("TOML scenarios need Python 3.11+; use JSON instead")
+            with open(path, 'rb') as file:
+                config = tomllib.load(file)
+        else:
+            with open(path) as file:
+                config = json.load(file)
+
+        name = os.path.splitext(os.path.basename(path))[0]
+        return cls(config.pop('name', name), **config)
+
+    def make_settings(self):
+        """ Return Settings with the scenario's overrides applied (unknown names are an error). """
+        return headless.make_settings(self.settings)
+
+
+def count_instances(*classes):
+    """ Return how many objects of each class are alive anywhere, not only in the groups. """
+    counts = [0] * len(classes)
+    for obj in gc.get_objects():
+        for index, cls in enumerate(classes):
+            if isinstance(obj, cls):
+                counts[index] += 1
+    return counts
+
+
+def take_sample(scenario, game, step, games, step_times):
+    """ Return one row of FIELDS for the game as it is after step. """
+    sample = {
+        'step': step,
+        'game_seconds': step * game.ai_settings.time_step,
+        'games': games,
+        'score': game.stats.score,
+        'level': game.stats.level,
+        'aliens': len(game.aliens),
+        'bullets': len(game.bullets),
+        'free_bullets': len(getattr(game.bullets, 'free', ())),
+        'step_ms_mean': sum(step_times) / len(step_times),
+        'step_ms_max': max(step_times),
+    }
+
+    # Objects alive but in no group are what a leak in the Group handling looks like
+    if scenario.count_objects:
+        sample['alien_objects'], sample['bullet_objects'] = count_instances(Alien, Bullet)
+        sample['objects'] = len(gc.get_objects())
+    if scenario.trace_memory:
+        current, peak = tracemalloc.get_traced_memory()
+        sample['memory_kb'] = current // 1024
+        sample['memory_peak_kb'] = peak // 1024
+    return sample
+
+
+def run(scenario, log=print):
+    """ Play the scenario and return its list of samples. """
+    random.seed(scenario.seed)
+    game = headless.HeadlessGame(scenario.make_settings())
+    policy = headless.POLICIES[scenario.policy](scenario.seed)
+    time_step = game.ai_settings.time_step
+    steps = int(round(scenario.duration / time_step))
+    sample_steps = max(1, int(round(scenario.sample_interval / time_step)))
+
+    if scenario.trace_memory:
+        tracemalloc.start()
+    game.reset()
+    log("{}: {} aliens, {} steps".format(scenario.name, len(game.aliens), steps))
+
+    samples = []
+    step_times = []
+    games = 1
+    shots = 0.0
+    for step in range(1, steps + 1):
+        if not game.stats.game_active:
+            if not scenario.restart:
+                break
+            game.reset()
+            games += 1
+
+        start = time.perf_counter()
+        # Auto fire: bullets owed by fire_rate are fired before the step that moves them
+        shots += scenario.fire_rate * time_step
+        while shots >= 1:
+            gf.fire_bullet(game.ai_settings, game.screen, game.ship, game.bullets)
+            shots -= 1
+        game.step(policy(game))
+        step_times.append((time.perf_counter() - start) * 1000.0)
+
+        if step % sample_steps == 0:
+            samples.append(take_sample(scenario, game, step, games, step_times))
+            step_times = []
+
+    if step_times:
+        samples.append(take_sample(scenario, game, step, games, step_times))
+    if scenario.trace_memory:
+        tracemalloc.stop()
+    return samples
+
+
+def summarize(scenario, samples):
+    """ Return a few lines on the run: step times, and how memory and objects grew. """
+    means = sorted(sample['step_ms_mean'] for sample in samples)
+    first, last = samples[0], samples[-1]
+    lines = ["{} steps, {} games: step ms median {:.3f}, worst sample {:.3f}, max {:.3f}".format(
+        last['step'], last['games'], means[len(means) // 2], means[-1],
+        max(sample['step_ms_max'] for sample in samples))]
+    if scenario.trace_memory:
+        lines.append("memory {} KB -> {} KB (peak {} KB)".format(
+            first['memory_kb'], last['memory_kb'], last['memory_peak_kb']))
+    if scenario.count_objects:
+        lines.append("objects {} -> {}, aliens {} -> {}, bullets {} -> {}".format(
+            first['objects'], last['objects'], first['alien_objects'], last['alien_objects'],
+            first['bullet_objects'], last['bullet_objects']))
+    return '\n'.join(lines)
+
+
+def save_csv(samples, path):
+    """ Write one row per sample. Columns that weren't recorded are left empty. """
+    with open(path, 'w', newline='') as file:
+        writer = csv.DictWriter(file, FIELDS)
+        writer.writeheader()
+        writer.writerows(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('scenario', help="a .toml or .json scenario file")
+    parser.add_argument('--output', help="write the samples to this CSV file")
+    parser.add_argument('--duration', type=float, help="override the scenario's duration (seconds)")
+    args = parser.parse_args()
+
+    scenario = Scenario.load(args.scenario)
+    if args.duration is not None:
+        scenario.duration = args.duration
+    samples = run(scenario)
+    if args.output:
+        save_csv(samples, args.output)
+    print(summarize(scenario, samples))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+# The states a game moves through. The timed ones last a number of seconds of game time
+# and then go back to playing.
+PLAYING = 'playing'
+RESPAWN_PAUSE = 'respawn_pause'
+LEVEL_TRANSITION = 'level_transition'
+GAME_OVER = 'game_over'
+TIMED_STATES = (RESPAWN_PAUSE, LEVEL_TRANSITION)
+
+
+class Scheduler():
+    """ Keep track of the game's state, and count down the timed ones.
+
+    The main loop spends each fixed time step through advance(), so a pause is a number of
+    steps in which nothing moves, while events are still handled and frames still drawn.
+    """
+
+    def __init__(self):
+        """ Start at the game over (Play button) state. """
+        self.state = GAME_OVER
+        self.time_left = 0.0
+
+    def enter(self, state, duration=0.0):
+        """ Switch to state. A timed state lasts duration seconds; with no duration (e.g.
+        headless runs) it is skipped and the game keeps playing. """
+        if state in TIMED_STATES and duration <= 0:
+            state = PLAYING
+        self.state = state
+        self.time_left = duration
+
+    def paused(self):
+        """ Return True while a timed state is counting down. """
+        return self.state in TIMED_STATES
+
+    def advance(self, seconds):
+        """ Spend seconds of game time in the current state. Returns True if the game is paused
+        for this step, so nothing should move. """
+        if self.state not in TIMED_STATES:
+            return False
+        # The pause is rounded to whole steps, so float error can't add an extra one
+        self.time_left -= seconds
+        if self.time_left < seconds / 2:
+            self.state = PLAYING
+        return True
@@ -1,6 +1,7 @@
+import pygame
 import pygame.font
-from pygame.sprite import Group
-from ship import Ship
+from text import GlyphAtlas
+import assets
 
 class Scoreboard():
 
@@ -15,36 +16,81 @@ class Scoreboard():
 
         # Font settings for scoring information
         self.text_color = (30, 30, 30)
-        self.font = pygame.font.SysFont(None, 36)
-        self.font_level = pygame.font.SysFont(None, 24)
+        self.font = assets.load_font(36)
+        self.font_level = assets.load_font(24)
+
+        # Numbers are built from pre-rendered digits instead of rasterized by the font each time
+        self.score_glyphs = GlyphAtlas(self.font, self.text_color, self.ai_settings.bg_color)
+        self.level_glyphs = GlyphAtlas(self.font_level, self.text_color, self.ai_settings.bg_color)
+
+        # Images that prep_*() marked as out of date; refresh() re-renders them
+        self.pending = set()
 
         # Prepare the initial score image.
-        self.prep_score()
-        self.prep_high_score()
+        self.render_score()
+        self.render_high_score()
         self.prep_high_score_label()
-        self.prep_level_image()
-        self.prep_stage()
-        self.prep_ships()
+        self.render_level_image()
+        self.render_stage()
+        self.render_ships()
+        self.compose_hud()
 
     def prep_score(self):
+        """ Mark the score image as out of date (several hits in one frame render once). """
+        self.pending.add('score')
+
+    def prep_high_score(self):
+        """ Mark the high score image as out of date. """
+        self.pending.add('high_score')
+
+    def prep_level_image(self):
+        """ Mark the level image as out of date. """
+        self.pending.add('level')
+
+    def prep_stage(self):
+        """ Mark the "Stage:" label as out of date. """
+        self.pending.add('stage')
+
+    def prep_ships(self):
+        """ Mark the ship icons as out of date. """
+        self.pending.add('ships')
+
+    def refresh(self):
+        """ Re-render the images marked out of date, in layout order (the level sits under the
+        score, and "Stage:" is placed against the score's width), and put the HUD back together. """
+        if not self.pending:
+            return
+        if 'score' in self.pending:
+            self.render_score()
+        if 'high_score' in self.pending:
+            self.render_high_score()
+        if 'score' in self.pending or 'level' in self.pending:
+            self.render_level_image()
+        if 'score' in self.pending or 'stage' in self.pending:
+            self.render_stage()
+        if 'ships' in self.pending:
+            self.render_ships()
+        self.pending.clear()
+        self.compose_hud()
+
+    def render_score(self):
         """ Turn the score into a rendered image. """
 
         # Negative integer will round value to nearest 10, 100, 1000, ...
         rounded_score = int(round(self.stats.score, -1))
         score_str = "{:,}".format(rounded_score)
-        self.score_image = self.font.render(score_str, True, self.text_color, self.ai_settings.bg_color)
+        self.score_image = self.score_glyphs.render(score_str)
 
         # Display the score at the top right of the screen
         self.score_rect = self.score_image.get_rect()
         self.score_rect.right = self.screen_rect.right - 20
         self.score_rect.top = 20
 
-    def prep_high_score(self):
+    def render_high_score(self):
         """ Turn the high score into a rendered image. """
         high_score = int(round(self.stats.high_score, -1))
         high_score_str = "{:,}".format(high_score)
-        self.high_score_image = self.font_level.render(high_score_str, True,
-                                                       self.text_color, self.ai_settings.bg_color)
+        self.high_score_image = self.level_glyphs.render(high_score_str)
 
         # Center the high score at the top of the screen.
         self.high_score_rect = self.high_score_image.get_rect()
@@ -63,44 +109,80 @@ class Scoreboard():
         self.high_score_text_rect.top = self.high_score_rect.top
         self.high_score_text_rect.left = self.high_score_rect.left - 125
 
-    def prep_level_image(self):
+    def render_level_image(self):
 
         """ Turn the level into a render image. """
-        self.level_image = self.font_level.render(str(self.stats.level),
-                                                  True, self.text_color, self.ai_settings.bg_color)
+        self.level_image = self.level_glyphs.render(str(self.stats.level))
         # Position the level below the score.
         self.level_image_rect = self.level_image.get_rect()
         self.level_image_rect.right = self.score_rect.right
         self.level_image_rect.top = self.score_rect.bottom + 10
 
-    def prep_stage(self):
+    def render_stage(self):
         ''' Write "Stage" in front of the stage number '''
-        self.level_text = self.font_level.render(str("Stage:"), True, self.text_color, self.ai_settings.bg_color)
+        # The label never changes, only where it goes
+        if not hasattr(self, 'level_text'):
+            self.level_text = self.font_level.render(str("Stage:"), True, self.text_color,
+                                                     self.ai_settings.bg_color)
 
         # "Stage:" font positioned before the score
         self.level_text_rect = self.level_text.get_rect()
         self.level_text_rect.right = self.score_rect.left - 10
         self.level_text_rect.top = self.score_rect.bottom + 10
 
-    def prep_ships(self):
+    def render_ships(self):
         """ Show many ships are left """
 
         # Basically applies the ship icon spaced next to each other depending on how many lives you have
-        self.ships = Group()
+        # Every icon is the ship's shared image, so only the positions are worked out here
+        self.ship_image = assets.load_image("rocket.png")
+        self.ship_rects = []
 
         for ship_number in range(self.stats.ships_left + 1):
-            ship = Ship(self.ai_settings, self.screen)
-            ship.rect.x = 10 + ship_number * ship.rect.width
-            ship.rect.y = 10
-            self.ships.add(ship)
-
+            rect = self.ship_image.get_rect()
+            rect.x = 10 + ship_number * rect.width
+            rect.y = 10
+            self.ship_rects.append(rect)
+
+    def compose_hud(self):
+        """ Draw every scoreboard image into one surface, so each frame draws the HUD with a
+        single blit. It is only rebuilt when one of the images changes. """
+        texts = [(self.score_image, self.score_rect),
+                 (self.high_score_image, self.high_score_rect),
+                 (self.high_score_text, self.high_score_text_rect),
+                 (self.level_image, self.level_image_rect),
+                 (self.level_text, self.level_text_rect)]
+
+        # A blit covers the whole image from the rect's topleft, whatever the rect's size
+        areas = [pygame.Rect(rect.topleft, image.get_size()) for image, rect in texts]
+        icons = [pygame.Rect(rect.topleft, self.ship_image.get_size()) for rect in self.ship_rects]
+        self.hud_rect = areas[0].unionall(areas[1:] + icons)
+
+        # Text is drawn on solid boxes; everything else stays see-through
+        hud = pygame.Surface(self.hud_rect.size, pygame.SRCALPHA)
+        hud.fill((0, 0, 0, 0))
+        offset = self.hud_rect.topleft
+        for (image, rect), area in zip(texts, areas):
+            hud.blit(image, area.move(-offset[0], -offset[1]))
+
+        # Ship icons go on top. Blending onto a transparent pixel would darken the icon's soft
+        # edges, so icons clear of the text are copied with MAX instead.
+        for area in icons:
+            flags = 0 if area.collidelist(areas) != -1 else pygame.BLEND_RGBA_MAX
+            hud.blit(self.ship_image, area.move(-offset[0], -offset[1]), None, flags)
+
+        # Run-length encoding skips the transparent gaps when the HUD is blitted
+        if pygame.display.get_surface() is not None:
+            hud = hud.convert_alpha()
+        hud.set_alpha(255, pygame.RLEACCEL)
+        self.hud_image = hud
+
+    def images(self):
+        """ Return every (surface, rect) pair show_score() draws. """
+        self.refresh()
+        return [(self.hud_image, self.hud_rect)]
 
     def show_score(self):
         """ Draw score to the screen. """
-        self.screen.blit(self.score_image, self.score_rect)
-        self.screen.blit(self.high_score_image, self.high_score_rect)
-        self.screen.blit(self.high_score_text, self.high_score_text_rect)
-        self.screen.blit(self.level_image, self.level_image_rect)
-        self.screen.blit(self.level_text, self.level_text_rect)
-
-        self.ships.draw(self.screen)
\ No newline at end of file
+        self.refresh()
+        self.screen.blit(self.hud_image, self.hud_rect)
\ No newline at end of file
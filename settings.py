@@ -1,3 +1,6 @@
+import pygame
+
+
 class Settings():
     """ A class used to store all settings for Alien Invasion """
 
@@ -6,22 +9,100 @@ class Settings():
 
         self.screen_width = 600
         self.screen_height = 400
+        # The game is laid out at screen_width x screen_height and shown this many times larger
+        # (whole pixels, so sprites stay sharp); 0 picks the largest that fits the desktop
+        self.display_scale = 1
         self.bg_color = (230, 230, 230)
-        self.ship_speed_factor = .2
+
+        # Timing settings
+        # The simulation advances in fixed steps, so every speed below is in pixels per second
+        self.updates_per_second = 120
+        self.time_step = 1.0 / self.updates_per_second
+        # Rendering is capped at max_fps (0 means uncapped)
+        self.max_fps = 60
+        # Longest frame the simulation will catch up on, so a stall doesn't cause a burst of updates
+        self.max_frame_time = .25
+        # 'software' blits to the display surface; 'texture' draws with SDL2's Renderer
+        # (GPU accelerated where available) and falls back to software if it can't start
+        self.render_backend = 'software'
+        # Only redraw and present the regions that changed (False redraws the whole screen)
+        self.dirty_rendering = True
+        # Print how long it took from launch to the first frame on screen
+        self.report_startup = False
+
+        # Profiler overlay (toggled with F3). F4 saves <profile_path>.csv and .trace.json
+        self.show_profiler = False
+        self.save_profile = False
+        self.profile_path = 'profile'
+
+        # Which action each key does; players can rebind them here, or with controls.rebind()
+        self.keymap = {
+            pygame.K_RIGHT: 'moving_right',
+            pygame.K_LEFT: 'moving_left',
+            pygame.K_SPACE: 'firing',
+            pygame.K_F3: 'toggle_profiler',
+            pygame.K_F4: 'save_profile',
+        }
+        # Holding fire shoots again every auto_fire_interval seconds (0 fires once per press)
+        self.auto_fire_interval = 0.25
+
+        # Record every input to record_path (None turns recording off), with a checkpoint of
+        # the score, level and ships every checkpoint_interval steps. replay.py plays it back
+        self.record_path = None
+        self.record_seed = 0
+        self.checkpoint_interval = 120
+
+        # Save every frame drawn into the directory capture_path (None turns capture off), as
+        # 'png' files or 'raw' RGB frames. A background thread writes them, and frames that
+        # don't fit in its queue of capture_queue_size are dropped rather than waited for
+        self.capture_path = None
+        self.capture_format = 'png'
+        self.capture_queue_size = 8
+
+        # Leaderboard of the best leaderboard_size games for each profile, saved in SQLite at
+        # high_score_path (None keeps the high score in memory only)
+        self.high_score_path = 'high_scores.sqlite3'
+        self.profile = 'player'
+        self.leaderboard_size = 10
+
+        # Speeds and points a game starts with; the game speeds up from these each level
+        # (see initialize_dynamic_settings()), so these are the ones to change
+        self.initial_ship_speed_factor = 200
         # The game's function actually has 3 lives ,but in scoreboard line 65, the range is exclusive??.
         self.ship_limit = 2
+        # Seconds the game pauses after the ship is hit, and before each new level starts
+        # (input is still handled and frames drawn; headless runs skip both)
+        self.respawn_pause = 0.5
+        self.level_pause = 0.0
 
         # Bullet settings
-        self.bullet_speed_factor = .1
+        self.initial_bullet_speed_factor = 600
         self.bullet_width = 3
         self.bullet_height = 15
         self.bullet_color = 60, 60, 60
         self.bullets_allowed = 3
 
         # Alien settings
-        self.alien_speed_factor = .1
+        # 'group' keeps one Sprite per alien in a plain Group, 'sprite' also indexes them by
+        # formation slot for fast collisions, 'array' stores the fleet in NumPy arrays
+        self.fleet_backend = 'sprite'
+        # Draw the 'sprite' or 'array' fleet as one pre-rendered image of the whole formation
+        self.prebaked_fleet = False
+        self.initial_alien_speed_factor = 100
         self.fleet_drop_speed = 20
-        self.fleet_direction = .3
+        self.initial_fleet_direction = 1
+        self.initial_alien_points = 50
+
+        # Explosion debris: never more than particle_budget particles at once (0 turns them
+        # off), particles_per_explosion for each alien shot down (four times that when the
+        # ship is hit), flying out at up to particle_speed pixels per second and fading out
+        # within particle_life seconds
+        self.particle_budget = 4096
+        self.particles_per_explosion = 12
+        self.particle_speed = 150
+        self.particle_life = 0.5
+        self.particle_size = 3
+        self.particle_color = (255, 140, 0)
 
         # How quickly the game speeds up
         self.speedup_scale = 1.05
@@ -34,15 +115,32 @@ class Settings():
     def initialize_dynamic_settings(self):
 
         """ Initialize settings that change throughout the game. """
-        self.ship_speed_factor = .2
-        self.bullet_speed_factor = .3
-        self.alien_speed_factor = .1
+        self.ship_speed_factor = self.initial_ship_speed_factor
+        self.bullet_speed_factor = self.initial_bullet_speed_factor
+        self.alien_speed_factor = self.initial_alien_speed_factor
 
         # fleet_Direction of 1 represents right; -1 represents left
-        self.fleet_direction = 1
+        self.fleet_direction = self.initial_fleet_direction
+        self.update_alien_step()
 
         # Scoring
-        self.alien_points = 50
+        self.alien_points = self.initial_alien_points
+
+    def update_alien_step(self):
+        """ Work out how far the fleet moves each step, signed by its direction. The fleets
+        read this once per step instead of every alien multiplying it out again. """
+        self.alien_step = self.alien_speed_factor * self.fleet_direction * self.time_step
+
+    def update_derived_settings(self):
+        """ Work out the settings computed from others again, after those have been changed
+        (the time step from updates_per_second, and the fleet's step from it). """
+        self.time_step = 1.0 / self.updates_per_second
+        self.update_alien_step()
+
+    def reverse_fleet_direction(self):
+        """ Send the fleet the other way. """
+        self.fleet_direction *= -1
+        self.update_alien_step()
 
     def increase_speed(self):
 
@@ -50,6 +148,7 @@ class Settings():
         self.ship_speed_factor *= self.speedup_scale
         self.bullet_speed_factor *= self.speedup_scale
         self.alien_speed_factor *= self.speedup_scale
+        self.update_alien_step()
 
         self.alien_points = int(self.alien_points * self.score_scale)
 
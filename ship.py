@@ -1,7 +1,12 @@
-import pygame
-from pygame.sprite import Sprite
+from entity import Entity
+from controls import InputState
+import assets
 
-class Ship(Sprite):
+class Ship(Entity):
+
+    # Fixed attributes, like the aliens and bullets
+    __slots__ = ('screen', 'ai_settings', 'image', 'rect', 'screen_rect', 'center',
+                 'previous_center', 'controls')
 
     def __init__(self, ai_settings, screen):
         """ Initialize the ship and set its starting position """
@@ -10,9 +15,9 @@ class Ship(Sprite):
         self.screen = screen
         self.ai_settings = ai_settings
 
-        # Load the ship image and gets its rect.
+        # Use the shared ship image and gets its rect.
 
-        self.image = pygame.image.load("rocket.png")
+        self.image = assets.load_image("rocket.png")
         self.rect = self.image.get_rect()
         self.screen_rect = screen.get_rect()
 
@@ -20,31 +25,41 @@ class Ship(Sprite):
         self.rect.centerx = self.screen_rect.centerx
         self.rect.bottom = self.screen_rect.bottom
 
-        # Store a decimal value for the ship's center.
+        # Store a decimal value for the ship's center, and where it was one step ago
+        # so drawing can interpolate between simulation steps.
         self.center = float(self.rect.centerx)
+        self.previous_center = self.center
 
-        # Movement flags
-        self.moving_right = False
-        self.moving_left = False
+        # The held controls (movement and fire flags), set by key events
+        self.controls = InputState()
 
     def update(self):
         """ Update the ship's position based on the movement flag. """
         # Update the ship's center value, but the rect
+        self.previous_center = self.center
+        step = self.ai_settings.ship_speed_factor * self.ai_settings.time_step
 
         # self.rect.right returns the x-coordinate value of the right edge of the ship's rect
         # If this value is <, then ship hasn't reached the right edge of the screen.
-        if self.moving_right and self.rect.right < self.screen_rect.right:
-            self.center += self.ai_settings.ship_speed_factor
+        if self.controls.moving_right and self.rect.right < self.screen_rect.right:
+            self.center += step
 
-        if self.moving_left and self.rect.left > 0:
-            self.center -= self.ai_settings.ship_speed_factor
+        if self.controls.moving_left and self.rect.left > 0:
+            self.center -= step
 
         # Update rect object from self.center
         self.rect.centerx = self.center
 
-    def blitme(self):
-        """ Draw the ship at its current location """
-        self.screen.blit(self.image, self.rect)
+    def interpolated_rect(self, alpha):
+        """ Return where to draw the ship, alpha of the way from its last step. """
+        rect = self.rect.copy()
+        rect.centerx = self.previous_center + (self.center - self.previous_center) * alpha
+        return rect
+
+    def blitme(self, alpha=1.0):
+        """ Draw the ship at its current location, alpha of the way from its last step. """
+        self.screen.blit(self.image, self.interpolated_rect(alpha))
 
     def center_ship(self):
-        self.center = self.screen_rect.centerx
\ No newline at end of file
+        self.center = self.screen_rect.centerx
+        self.previous_center = self.center
\ No newline at end of file
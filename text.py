@@ -0,0 +1,54 @@
+import pygame
+
+# Everything the scoreboard's numbers are made of
+NUMBER_CHARACTERS = '0123456789,-'
+
+
+class GlyphAtlas():
+    """ Characters rendered once into a single strip, so numbers can be built by blitting
+    pieces of it instead of rasterizing a new string with the font every time. """
+
+    def __init__(self, font, color, bg_color, characters=NUMBER_CHARACTERS):
+        """ Render each character once, side by side, and remember where each one is. """
+        self.font = font
+        self.color = color
+        self.bg_color = bg_color
+
+        glyphs = [(character, font.render(character, True, color, bg_color)) for character in characters]
+        self.height = max(glyph.get_height() for character, glyph in glyphs)
+        self.atlas = pygame.Surface((sum(glyph.get_width() for character, glyph in glyphs), self.height))
+        self.atlas.fill(bg_color)
+
+        # character -> the area of the atlas holding it
+        self.areas = {}
+        x = 0
+        for character, glyph in glyphs:
+            self.atlas.blit(glyph, (x, 0))
+            self.areas[character] = pygame.Rect(x, 0, glyph.get_width(), self.height)
+            x += glyph.get_width()
+
+        # The last string rendered, since the same number is often asked for again
+        self.last_text = None
+        self.last_surface = None
+
+    def render(self, text):
+        """ Return a surface with text drawn from the atlas. Text with characters missing
+        from the atlas is rendered by the font instead. """
+        if text == self.last_text:
+            return self.last_surface
+
+        areas = self.areas
+        if not all(character in areas for character in text):
+            return self.font.render(text, True, self.color, self.bg_color)
+
+        surface = pygame.Surface((sum(areas[character].width for character in text), self.height))
+        blits = []
+        x = 0
+        for character in text:
+            area = areas[character]
+            blits.append((self.atlas, (x, 0), area))
+            x += area.width
+        surface.blits(blits, False)
+        self.last_text = text
+        self.last_surface = surface
+        return surface
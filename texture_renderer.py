@@ -0,0 +1,156 @@
+""" Draw with SDL2's Renderer API. Run on its own to check it against software rendering:
+
+    python texture_renderer.py
+"""
+import sys
+
+import pygame
+from renderer import SpriteLayer
+
+# The SDL2 Renderer API is only needed for the texture backend; the software path works
+# without it.
+try:
+    from pygame._sdl2 import video
+except ImportError:
+    video = None
+
+
+class TextureRenderer():
+    """ Draw each frame with SDL2's Renderer, as textured quads instead of software blits.
+
+    Every surface drawn is uploaded to a texture the first frame it appears and reused for
+    as long as it keeps being drawn, so the shared alien and ship images are uploaded once
+    and the HUD only when it's rebuilt. The one surface changed in place, a baked fleet that
+    has aliens erased from it, is uploaded again whenever the fleet's baked_revision moves on. There is no display surface; the game objects use
+    an offscreen surface of the same size (self.screen) for their layout.
+    """
+
+    def __init__(self, ai_settings, window, renderer):
+        """ Initialize the backend for a window and its SDL renderer. """
+        self.ai_settings = ai_settings
+        self.window = window
+        self.renderer = renderer
+        self.screen = pygame.Surface((ai_settings.screen_width, ai_settings.screen_height))
+
+        # Surface -> (texture, revision it was uploaded at) for everything drawn last frame
+        self.textures = {}
+
+    @classmethod
+    def create(cls, ai_settings, title="Alien Invasion"):
+        """ Open a window with an SDL renderer, or return None if that isn't possible here
+        (the caller falls back to software rendering). """
+        if video is None:
+            return None
+        try:
+            window = video.Window(title, size=(ai_settings.screen_width * ai_settings.display_scale,
+                                               ai_settings.screen_height * ai_settings.display_scale))
+            renderer = video.Renderer(window)
+        except pygame.error:
+            return None
+
+        # Draw in game coordinates and let SDL scale the whole frame up by display_scale
+        renderer.scale = (ai_settings.display_scale, ai_settings.display_scale)
+        return cls(ai_settings, window, renderer)
+
+    def invalidate(self):
+        """ Every frame is drawn in full, so there is nothing to invalidate. """
+
+    def render(self, stats, sb, ship, aliens, bullets, play_button, alpha=1.0, extra_overlays=(),
+               particles=None):
+        """ Draw the frame in the same order as a software full redraw and present it. """
+        renderer = self.renderer
+        textures = {}
+
+        def texture(surface, revision=0):
+            """ Return the texture for surface, uploading it if it wasn't drawn last frame or
+            has changed since (its revision is different). """
+            found = textures.get(surface)
+            if found is None:
+                found = self.textures.get(surface)
+                if found is None:
+                    found = (video.Texture.from_surface(renderer, surface), revision)
+                elif found[1] != revision:
+                    found[0].update(surface)
+                    found = (found[0], revision)
+                textures[surface] = found
+            return found[0]
+
+        renderer.draw_color = pygame.Color(self.ai_settings.bg_color)
+        renderer.clear()
+
+        # Bullets behind the ship and aliens, as filled rects
+        sprites = SpriteLayer(ship, aliens, bullets, alpha, particles)
+        for color, rect in sprites.bullets:
+            renderer.draw_color = pygame.Color(color)
+            renderer.fill_rect(rect)
+
+        texture(sprites.ship_image).draw(dstrect=sprites.ship_rect)
+        fleet_revision = getattr(aliens, 'baked_revision', 0)
+        for image, topleft in sprites.fleet:
+            texture(image, fleet_revision).draw(dstrect=topleft)
+        for image, topleft in sprites.particles:
+            texture(image).draw(dstrect=topleft)
+
+        # Scoreboard, Play button and extra overlays on top
+        overlays = list(sb.images())
+        if not stats.game_active:
+            overlays.append((play_button.image, play_button.rect))
+        overlays.extend(extra_overlays)
+        for image, rect in overlays:
+            texture(image).draw(dstrect=rect.topleft)
+
+        renderer.present()
+
+        # Textures for surfaces that weren't drawn this frame are released
+        self.textures = textures
+
+
+
+def check_killed_alien(fleet_backend):
+    """ Render a baked fleet with both backends, kill an alien, render again, and return
+    the two colors drawn in the middle of its slot (software, texture). They should both be
+    the background: a texture that kept the dead alien's pixels would show it still there. """
+    # headless sets up the dummy video driver, so it's only imported for the check
+    import headless
+    import game_functions as gf
+
+    pygame.display.init()
+    ai_settings = headless.make_settings({'fleet_backend': fleet_backend, 'prebaked_fleet': True})
+    backend = TextureRenderer.create(ai_settings)
+    if backend is None:
+        raise RuntimeError("the SDL2 renderer isn't available here")
+    game = headless.HeadlessGame(ai_settings, backend.screen)
+    game.reset()
+    objects = (ai_settings, game.screen, game.stats, game.sb, game.ship, game.aliens,
+               game.bullets, None)
+
+    # The texture is uploaded while the alien in slot (1, 0) is still alive
+    gf.update_screen(*objects, renderer=backend)
+    aliens = game.aliens
+    if fleet_backend == 'array':
+        center = pygame.Rect(aliens.left()[1], aliens.y[1], aliens.width, aliens.height).center
+        aliens._kill([1])
+    else:
+        alien = aliens.grid.cells[(1, 0)]
+        center = alien.rect.center
+        alien.kill()
+
+    gf.update_screen(*objects, renderer=backend)
+    texture_color = backend.renderer.to_surface().get_at(center)
+    gf.update_screen(*objects)
+    return game.screen.get_at(center), texture_color
+
+
+def main():
+    failed = False
+    for fleet_backend in ('sprite', 'array'):
+        software, texture = check_killed_alien(fleet_backend)
+        ok = software == texture
+        failed = failed or not ok
+        print("{} fleet, killed alien's slot: software {}, texture {}: {}".format(
+            fleet_backend, tuple(software), tuple(texture), 'ok' if ok else 'MISMATCH'))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()